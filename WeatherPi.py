@@ -15,42 +15,65 @@ import logging
 import os
 import sys
 import time
-import requests
 import pygame
 
 from modules.BuiltIn import (Alerts, Clock, Location, Weather, WeatherForecast,
                              SunriseSuset, MoonPhase, Wind)
+from modules.DataCache import DataCache
+from modules.FontCache import font_cache
+from modules.IconCache import icon_cache
+from modules.FrameScheduler import FrameScheduler
+from modules.PerformanceHUD import PerformanceHUD
+from modules.RefreshScheduler import RefreshScheduler
 from modules.RepeatedTimer import RepeatedTimer
+from modules.Scheduler import scheduler
+from modules.SessionPool import session_pool
+from modules.TextCache import text_cache
+from modules.WeatherData import WeatherData
+from modules.WeatherModule import Utils
 
 
-def weather_forecast(appid, latitude, longitude, language, units):
+def weather_forecast(appid,
+                     latitude,
+                     longitude,
+                     language,
+                     units,
+                     cache=None):
     """get weather forcast data using openweather api
+
+    The fetch time is added as "fetched_at" and the last good response is
+    saved to the cache.
     """
     try:
-        resopnse = requests.get(
+        resopnse = session_pool.get(
             "https://api.openweathermap.org/data/2.5/onecall" +
             "?appid={}&lat={}&lon={}&lang={}&units={}".format(
                 appid, latitude, longitude, language, units))
         resopnse.raise_for_status()
-        return resopnse.json()
+        data = resopnse.json()
+        data["fetched_at"] = time.time()
+        if cache:
+            cache.save(data, data["fetched_at"])
+        return data
 
     except Exception as e:
         logging.error(e, exc_info=True)
         return None
 
 
-def geocode(key, language, address, latitude, longitude):
+def geocode(key, language, address, latitude, longitude, timeout=None):
     """get latitude, longitude from address using google geocode api
     """
     try:
-        response = requests.get(
+        response = session_pool.get(
             "https://maps.googleapis.com/maps/api/geocode/json",
             params={
                 "address": address,
                 "language": language,
                 "latlng": "{},{}".format(latitude, longitude),
                 "key": key
-            })
+            },
+            timeout=timeout if timeout else session_pool.timeout)
         response.raise_for_status()
         data = response.json()
         location = data["results"][0]["geometry"]["location"]
@@ -68,6 +91,48 @@ def geocode(key, language, address, latitude, longitude):
         return None
 
 
+def scale_rect(rect, screen_size, scale):
+    """convert a screen rect to the scaled display rect
+    """
+    ratio_x = scale[0] / screen_size[0]
+    ratio_y = scale[1] / screen_size[1]
+    left = int(rect.left * ratio_x)
+    top = int(rect.top * ratio_y)
+    right = int(rect.right * ratio_x + 0.999)
+    bottom = int(rect.bottom * ratio_y + 0.999)
+    return pygame.Rect(left, top, right - left, bottom - top)
+
+
+def scale_layout(config, ratio):
+    """scale module rects and font sizes to the display resolution
+    """
+    fonts = config["fonts"]
+    fonts["size"] = {
+        name: int(round(size * ratio))
+        for name, size in fonts["size"].items()
+    }
+    for module in config["modules"]:
+        conf = module["config"]
+        for key in ("rect", "graph_rect"):
+            if key in conf:
+                conf[key] = [int(round(value * ratio)) for value in conf[key]]
+        # modules scale their icon sizes and offsets by this ratio
+        conf["layout_scale"] = ratio
+
+
+def redraw_icon_placeholders(modules, refresh_scheduler, name, size):
+    """make the modules that drew the placeholder of a loaded icon due
+
+    Returns whether any module is to be redrawn.
+    """
+    redraw = False
+    for module in modules:
+        if module.icon_loaded(name, size):
+            refresh_scheduler.invalidate(module)
+            redraw = True
+    return redraw
+
+
 def main():
     """main program
     """
@@ -80,6 +145,12 @@ def main():
                         const=True,
                         default=False)
     parser.add_argument("--screenshot", "-s")
+    parser.add_argument("--config", "-c", help="config file")
+    parser.add_argument("--hud",
+                        action="store_const",
+                        const=True,
+                        default=False,
+                        help="show performance overlay")
     args = parser.parse_args()
     logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO,
                         stream=sys.stdout,
@@ -88,6 +159,9 @@ def main():
     # initialize thread
     timer_thread = None
 
+    # initialize framebuffer output
+    framebuffer = None
+
     # initialize modules
     modules = []
 
@@ -99,13 +173,21 @@ def main():
 
     try:
         # load config file
-        file = "/boot/WeatherPi.json"
+        file = args.config if args.config else "/boot/WeatherPi.json"
         if not os.path.exists(file):
             file = "{}/config.json".format(sys.path[0])
         with open(file, "r") as f:
             config = json.loads(f.read())
         logging.info("%s loaded", file)
 
+        # initialize http session pool
+        if "http" in config:
+            session_pool.configure(**config["http"])
+
+        # initialize text surface cache
+        if "text_cache" in config:
+            text_cache.configure(**config["text_cache"])
+
         # initialize locale, gettext
         language = config["locale"].split("_")[0]
         locale.setlocale(locale.LC_ALL, config["locale"])
@@ -115,11 +197,30 @@ def main():
                                     fallback=True)
         trans.install()
 
-        # initialize address, latitude and longitude
+        # initialize cache directory (last response, font files, icons)
+        cache_dir = "{}/cache".format(sys.path[0])
+        if "cache_dir" in config:
+            cache_dir = config["cache_dir"]
+        font_cache.configure("{}/fonts.json".format(cache_dir))
+        icon_cache.configure("{}/icons".format(cache_dir), Utils.icon_loaded)
+
+        # load the last response on disk (keyed on the configured location,
+        # geocoding may fail while the network is not up yet)
+        cache = DataCache("{}/onecall.json".format(cache_dir), [
+            config["latitude"], config["longitude"], config["address"],
+            language, config["units"]
+        ])
+        cached = cache.load()
+
+        # initialize address, latitude and longitude (without holding up
+        # the cached data for long)
         if "google_api_key" in config and config["google_api_key"]:
-            results = geocode(config["google_api_key"], language,
-                              config["address"], config["latitude"],
-                              config["longitude"])
+            results = geocode(config["google_api_key"],
+                              language,
+                              config["address"],
+                              config["latitude"],
+                              config["longitude"],
+                              timeout=(2, 5) if cached else None)
             if results is not None:
                 latitude, longitude, address = results
                 config["latitude"] = latitude
@@ -128,11 +229,16 @@ def main():
                 logging.info("location: %s,%s %s", latitude, longitude,
                              address)
 
-        # start weather forecast thread
-        timer_thread = RepeatedTimer(600, weather_forecast, [
-            config["openweather_appid"], config["latitude"],
-            config["longitude"], language, config["units"]
-        ])
+        # start weather forecast job (with the last response on disk)
+        timer_thread = RepeatedTimer(600,
+                                     weather_forecast, [
+                                         config["openweather_appid"],
+                                         config["latitude"],
+                                         config["longitude"], language,
+                                         config["units"]
+                                     ], {"cache": cache},
+                                     keep_last=True)
+        timer_thread.set_result(cached)
         timer_thread.start()
 
         # initialize pygame
@@ -140,9 +246,17 @@ def main():
             os.putenv("DISPLAY", config["DISPLAY_NO"])
         if "SDL_FBDEV" in config:
             os.putenv("SDL_FBDEV", config["SDL_FBDEV"])
+        if "framebuffer" in config:
+            # render off-screen and write to the framebuffer directly
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
         pygame.init()
         pygame.mouse.set_visible(False)
-        if pygame.display.mode_ok(config["display"]):
+        if "framebuffer" in config:
+            from modules.Framebuffer import Framebuffer
+            display = screen = pygame.display.set_mode(config["display"])
+            scale = None
+            framebuffer = Framebuffer(config["framebuffer"], screen.get_size())
+        elif pygame.display.mode_ok(config["display"]):
             display = screen = pygame.display.set_mode(config["display"])
             scale = None
         else:
@@ -154,10 +268,17 @@ def main():
                 scale = (display_w, int(display_w / screen_w * screen_h))
             else:
                 scale = (int(display_h / screen_h * screen_w), display_h)
+            if "scale_layout" in config and config["scale_layout"]:
+                # render the layout at the display resolution once
+                scale_layout(config, scale[0] / screen_w)
+                screen = display
+                scale = None
         DISPLAY_SLEEP = pygame.USEREVENT + 1
         DISPLAY_WAKEUP = pygame.USEREVENT + 2
         RESTART = pygame.USEREVENT + 3
         REBOOT = pygame.USEREVENT + 4
+        DATA_UPDATED = pygame.USEREVENT + 5
+        ICON_LOADED = pygame.USEREVENT + 6
         logging.info("pygame initialized. display:%s screen:%s scale:%s",
                      display.get_size(), screen.get_size(), scale)
 
@@ -183,34 +304,28 @@ def main():
             modules.append((mod)(fonts, location, language, units, conf))
         logging.info("modules loaded")
 
+        # load the weather icons of all conditions in the background
+        icon_cache.prewarm({
+            size
+            for module in modules for size in module.icon_sizes()
+        })
+
         # main loop
         display_wakeup = True
-        last_hash_value = None
+        last_version = None
+        weather = None
         running = True
+        frame_scheduler = FrameScheduler()
+        refresh_scheduler = RefreshScheduler(modules)
+        hud = PerformanceHUD(fonts) if args.hud else None
         while running:
-            # weather data check
-            weather = timer_thread.get_result()
-            updated = False
-            if weather:
-                hash_value = timer_thread.get_hash_value()
-                if last_hash_value != hash_value:
-                    logging.info("weather data updated")
-                    last_hash_value = hash_value
-                    updated = True
-
-            # update screen
-            for module in modules:
-                module.draw(screen, weather, updated)
-
-            # update display
-            if display_wakeup:
-                if scale:
-                    # fit to display
-                    display.blit(pygame.transform.scale(screen, scale), (0, 0))
-                pygame.display.flip()
+            # wait for the next second or an event
+            tick, events = frame_scheduler.wait()
 
             # event check
-            for event in pygame.event.get():
+            data_updated = False
+            redraw = False
+            for event in events:
                 if event.type == pygame.QUIT:
                     running = False
                 elif event.type == RESTART:
@@ -219,17 +334,81 @@ def main():
                 elif event.type == REBOOT:
                     running = False
                     reboot = True
+                elif event.type == DATA_UPDATED:
+                    data_updated = True
+                elif event.type == ICON_LOADED:
+                    # replace the icon placeholders
+                    if redraw_icon_placeholders(modules, refresh_scheduler,
+                                                event.name, event.size):
+                        redraw = True
                 elif event.type == DISPLAY_SLEEP:
                     if display_wakeup:
                         display.fill(pygame.Color("black"))
-                        pygame.display.flip()
+                        if framebuffer:
+                            framebuffer.update(display)
+                        else:
+                            pygame.display.flip()
                         display_wakeup = False
                 elif event.type == DISPLAY_WAKEUP:
                     if not display_wakeup:
-                        last_hash_value = None
+                        last_version = None
                         display_wakeup = True
+                        refresh_scheduler.invalidate()
+                        Utils.add_dirty_rect(screen.get_rect())
+            if not (tick or data_updated or redraw):
+                continue
+
+            # weather data check
+            changed = set()
+            version = timer_thread.get_version()
+            if last_version != version:
+                # parse the new response once
+                result = timer_thread.get_result()
+                if result:
+                    changed = timer_thread.get_changed_sections(last_version)
+                    logging.info("weather data updated: %s",
+                                 ",".join(sorted(changed)))
+                    weather = WeatherData(result, config["units"])
+                    last_version = version
+
+            # update screen (only the modules that are due)
+            if hud:
+                hud.erase(screen)
+            refresh_scheduler.draw(screen, weather, changed, data_updated
+                                   or bool(changed))
+            if hud:
+                hud.draw(screen, frame_scheduler, refresh_scheduler,
+                         timer_thread)
+
+            # update display (only the areas changed by modules)
+            rects = Utils.pop_dirty_rects()
+            if display_wakeup and rects:
+                if framebuffer:
+                    framebuffer.update(screen, rects)
+                else:
+                    if scale:
+                        # fit to display
+                        display.blit(pygame.transform.scale(screen, scale),
+                                     (0, 0))
+                        rects = [
+                            scale_rect(rect, screen.get_size(), scale)
+                            for rect in rects
+                        ]
+                    pygame.display.update(rects)
+
+            if tick and frame_scheduler.ticks % 3600 == 0:
+                logging.info("frame pacing: %s %s",
+                             frame_scheduler.get_stats(),
+                             refresh_scheduler.get_stats())
+                logging.info("http sessions: %s", session_pool.get_stats())
+                logging.info("text cache: %s", text_cache.get_stats())
+                logging.info("scheduler: %s", scheduler.get_stats())
 
-            time.sleep(1)
+        logging.info("frame pacing: %s %s", frame_scheduler.get_stats(),
+                     refresh_scheduler.get_stats())
+        logging.info("http sessions: %s", session_pool.get_stats())
+        logging.info("text cache: %s", text_cache.get_stats())
+        logging.info("scheduler: %s", scheduler.get_stats())
 
     except Exception as e:
         logging.error(e, exc_info=True)
@@ -241,6 +420,9 @@ def main():
             timer_thread.quit()
         for module in modules:
             module.quit()
+        icon_cache.quit()
+        if framebuffer:
+            framebuffer.close()
         pygame.quit()
         if restart:
             logging.info("restarting..")
@@ -0,0 +1,176 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name, wrong-import-position
+"""Graph conversion benchmark
+
+Plots the graphs of WeatherForcustGraph (from a recorded One Call response)
+and TemperatureGraph (from a synthetic sensor log) and compares converting
+the figure to a pygame surface through a PNG round trip (savefig and
+pygame.image.load) with wrapping the Agg RGBA buffer (figure_to_surface).
+Prints the latency of both paths and the largest pixel difference between
+their results as JSON.
+
+usage:
+    benchmarks/graph_benchmark.py --repeat 20 --rect 480 160
+"""
+
+import argparse
+import datetime
+import io
+import json
+import os
+import sys
+import time
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pygame
+import matplotlib.pyplot as plt
+from modules.GraphUtils import GraphUtils, figure_to_surface, plot_2axis_graph
+from modules.RefreshScheduler import percentile
+from modules.WeatherData import WeatherData
+from modules.WeatherForcustGraph import label_name
+
+FIXTURES = "{}/benchmarks/fixtures".format(ROOT)
+
+
+def weather_forcust_graph_data(weather, block, conditions):
+    """times, y1, ylabel1, y2 and ylabel2 as WeatherForcustGraph plots them
+    """
+    data = getattr(weather, block)
+    (condition1, condition2) = conditions
+    return (data.times(), data.column(condition1), label_name(condition1),
+            data.column(condition2), label_name(condition2))
+
+
+def temperature_graph_data(window_size=6 * 60, measured=5 * 60):
+    """times, y1, ylabel1, y2 and ylabel2 as TemperatureGraph plots them
+
+    A sensor log of window_size minutes, of which only the last measured
+    minutes have values (as after a restart).
+    """
+    now = datetime.datetime.now()
+    times = [
+        now - datetime.timedelta(minutes=x) for x in range(window_size, 0, -1)
+    ]
+    minutes = np.arange(window_size)
+    temperatures = (22 + 2 * np.sin(minutes / 60)).tolist()
+    humidities = (50 + 10 * np.cos(minutes / 90)).tolist()
+    for i in range(window_size - measured):
+        temperatures[i] = humidities[i] = np.nan
+
+    # smoothing by moving average
+    kernel = np.ones(4) / 4
+    return (times[1:-2], np.convolve(temperatures, kernel, mode="valid"),
+            "Temperature", np.convolve(humidities, kernel,
+                                       mode="valid"), "Humidity")
+
+
+def png_to_surface(fig):
+    """the PNG round trip that figure_to_surface replaces
+    """
+    f = io.BytesIO()
+    fig.savefig(f, format="png")
+    f.seek(0)
+    return pygame.image.load(f)
+
+
+def measure(function, fig, repeat):
+    """call function(fig) repeat times and return the latencies
+    """
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        surface = function(fig)
+        latencies.append(time.perf_counter() - start)
+    return latencies, surface
+
+
+def summary(values, scale=1000):
+    """summarize values (seconds to milliseconds by default)
+    """
+    return {
+        "mean": round(sum(values) / len(values) * scale, 3),
+        "p50": round(percentile(values, 50) * scale, 3),
+        "p99": round(percentile(values, 99) * scale, 3),
+        "max": round(max(values) * scale, 3)
+    }
+
+
+def main():
+    """benchmark program
+    """
+    parser = argparse.ArgumentParser(description=__file__)
+    parser.add_argument("--repeat", "-n", type=int, default=20)
+    parser.add_argument("--rect",
+                        type=int,
+                        nargs=2,
+                        default=[480, 160],
+                        metavar=("WIDTH", "HEIGHT"),
+                        help="graph size")
+    parser.add_argument("--fixture",
+                        "-f",
+                        default="{}/onecall.json".format(FIXTURES),
+                        help="One Call JSON fixture")
+    parser.add_argument("--font", help="graph font name")
+    parser.add_argument("--output", "-o", help="output file (default stdout)")
+    args = parser.parse_args()
+
+    # figure_to_surface converts to the display format
+    pygame.init()
+    pygame.display.set_mode(args.rect)
+    if args.font:
+        GraphUtils.set_font(args.font)
+
+    with open(args.fixture, "r") as f:
+        weather = WeatherData(json.loads(f.read()), "metric")
+    graphs = {
+        "WeatherForcustGraph hourly temp,humidity":
+        weather_forcust_graph_data(weather, "hourly", ("temp", "humidity")),
+        "WeatherForcustGraph daily temp.max,rain":
+        weather_forcust_graph_data(weather, "daily", ("temp.max", "rain")),
+        "TemperatureGraph":
+        temperature_graph_data()
+    }
+
+    rect = pygame.Rect((0, 0), args.rect)
+    results = {}
+    for name, (times, y1, ylabel1, y2, ylabel2) in graphs.items():
+        fig = plot_2axis_graph(rect, times, y1, ylabel1, y2, ylabel2, None,
+                               None, None)
+        (png, png_surface) = measure(png_to_surface, fig, args.repeat)
+        (buffer, buffer_surface) = measure(figure_to_surface, fig,
+                                           args.repeat)
+        plt.close(fig)
+
+        difference = np.abs(
+            pygame.surfarray.array3d(png_surface).astype(np.int16) -
+            pygame.surfarray.array3d(buffer_surface))
+        results[name] = {
+            "png_ms": summary(png),
+            "buffer_ms": summary(buffer),
+            "speedup": round(sum(png) / sum(buffer), 2),
+            "max_pixel_diff": int(difference.max())
+        }
+
+    output = json.dumps(
+        {
+            "rect": args.rect,
+            "repeat": args.repeat,
+            "graphs": results
+        }, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
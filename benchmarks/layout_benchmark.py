@@ -0,0 +1,324 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name, wrong-import-position, too-many-locals
+"""Headless layout benchmark
+
+Runs WeatherPi.main under SDL's dummy video driver with recorded One Call
+responses instead of weather_forecast, renders N frames of a config and
+prints per-frame and per-module latency, peak memory and allocations per
+frame as JSON.
+
+usage:
+    benchmarks/layout_benchmark.py example.480x320.config.json --frames 300
+"""
+
+import argparse
+import collections
+import copy
+import json
+import logging
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+
+# WeatherPi loads locale files and icons from sys.path[0]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pygame
+from PIL import Image, ImageDraw
+import WeatherPi
+import modules.WeatherModule as weather_module
+from modules.IconCache import IconCache
+from modules.FrameScheduler import FrameScheduler
+from modules.RefreshScheduler import RefreshScheduler, percentile
+from modules.RepeatedTimer import RepeatedTimer
+from modules.TextCache import text_cache
+
+FIXTURES = "{}/benchmarks/fixtures".format(ROOT)
+
+
+class FixtureForecast:
+    """weather_forecast replacement returning recorded One Call responses
+
+    Fixtures are returned in turn. current.dt is advanced on every call so
+    that each fetch is seen as new data, as it is with the live API.
+    """
+
+    def __init__(self, files):
+        self.fixtures = []
+        for file in files:
+            with open(file, "r") as f:
+                self.fixtures.append(json.loads(f.read()))
+        self.calls = 0
+        self.__name__ = "weather_forecast"
+
+    def __call__(self, *_args, **_kwargs):
+        data = copy.deepcopy(self.fixtures[self.calls % len(self.fixtures)])
+        data["current"]["dt"] += self.calls * 600
+        self.calls += 1
+        return data
+
+
+def fixture_icon(name):
+    """draw a weather icon locally instead of downloading it
+
+    Day icons are orange and night icons are gray discs, 100px like the
+    OpenWeather @2x icons.
+    """
+    image = Image.new("RGBA", (100, 100))
+    draw = ImageDraw.Draw(image)
+    draw.ellipse([(10, 10), (90, 90)],
+                 fill="orange" if name.endswith("d") else "gray")
+    draw.text((35, 45), name, fill="black")
+    return image
+
+
+class FixtureIconCache(IconCache):
+    """IconCache that loads fixture icons synchronously
+
+    No network access, and no placeholders or ICON_LOADED redraws that
+    would make runs differ.
+    """
+
+    def original(self, name):
+        return fixture_icon(name)
+
+    def get(self, name, size):
+        if (name, size) not in self.images:
+            self.load(name, [size])
+        return self.images.get((name, size))
+
+    def prewarm(self, sizes):
+        pass
+
+
+class ErrorCounter(logging.Handler):
+    """count the errors logged during the run
+    """
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+class FixtureTimer(RepeatedTimer):
+    """RepeatedTimer that fetches synchronously when the benchmark asks
+    """
+    timers = []
+
+    def start(self):
+        FixtureTimer.timers.append(self)
+        self.fetch()
+
+    def fetch(self):
+        """run the function once in the calling thread
+        """
+        self.run()
+
+
+class BenchmarkRefreshScheduler(RefreshScheduler):
+    """RefreshScheduler driven by the simulated benchmark clock
+    """
+    now = time.time()
+    instance = None
+
+    def __init__(self, modules):
+        super().__init__(modules)
+        self.draw_times = {module: [] for module in modules}
+        BenchmarkRefreshScheduler.instance = self
+
+    @staticmethod
+    def clock():
+        return BenchmarkRefreshScheduler.now
+
+
+class BenchmarkScheduler(FrameScheduler):
+    """FrameScheduler that runs frames back to back
+
+    Every frame is a one-second tick of a simulated clock. Weather data is
+    refreshed every `fetch_interval` frames and the main loop is stopped
+    after `frames` frames.
+    """
+    frames_to_run = 60
+    fetch_interval = 600
+    trace_memory = True
+    instance = None
+
+    def __init__(self):
+        super().__init__()
+        self.frame_latencies = []
+        self.frame_allocations = []
+        self.frame_blocks = []
+        self.frame_start = None
+        self.blocks = None
+        self.traced = None
+        BenchmarkScheduler.instance = self
+
+    def wait(self):
+        if self.frame_start is not None:
+            self.frame_latencies.append(time.perf_counter() -
+                                        self.frame_start)
+            self.frame_blocks.append(sys.getallocatedblocks() - self.blocks)
+            if BenchmarkScheduler.trace_memory:
+                _current, peak = tracemalloc.get_traced_memory()
+                self.frame_allocations.append(peak - self.traced)
+
+        interval = BenchmarkScheduler.fetch_interval
+        if self.frames >= BenchmarkScheduler.frames_to_run:
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+        elif self.frames and self.frames % interval == 0:
+            for timer in FixtureTimer.timers:
+                timer.fetch()
+
+        BenchmarkRefreshScheduler.now += 1
+        self.frames += 1
+        self.ticks += 1
+        self.frame_times.append(BenchmarkRefreshScheduler.now)
+        events = pygame.event.get()
+
+        self.blocks = sys.getallocatedblocks()
+        if BenchmarkScheduler.trace_memory:
+            tracemalloc.reset_peak()
+            self.traced = tracemalloc.get_traced_memory()[0]
+        self.frame_start = time.perf_counter()
+        return True, events
+
+
+def summary(values, scale=1000):
+    """summarize values (seconds to milliseconds by default)
+    """
+    if not values:
+        return None
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values) * scale, 3),
+        "p50": round(percentile(values, 50) * scale, 3),
+        "p99": round(percentile(values, 99) * scale, 3),
+        "max": round(max(values) * scale, 3)
+    }
+
+
+def main():
+    """benchmark program
+    """
+    parser = argparse.ArgumentParser(description=__file__)
+    parser.add_argument("config", help="config file")
+    parser.add_argument("--frames", "-n", type=int, default=60)
+    parser.add_argument("--fixture",
+                        "-f",
+                        action="append",
+                        help="One Call JSON fixture (can be repeated)")
+    parser.add_argument("--fetch-interval",
+                        type=int,
+                        default=600,
+                        help="frames between weather data updates")
+    parser.add_argument("--budget",
+                        type=float,
+                        default=1000,
+                        help="frame budget in milliseconds")
+    parser.add_argument("--locale", help="override config locale")
+    parser.add_argument("--no-tracemalloc",
+                        action="store_true",
+                        help="do not trace allocations (lower overhead)")
+    parser.add_argument("--output", "-o", help="output file (default stdout)")
+    args = parser.parse_args()
+
+    # config for this run
+    with open(args.config, "r") as f:
+        config = json.loads(f.read())
+    if args.locale:
+        config["locale"] = args.locale
+    config["google_api_key"] = ""
+    cache_dir = tempfile.mkdtemp(prefix="layout_benchmark")
+    config["cache_dir"] = cache_dir
+    with tempfile.NamedTemporaryFile("w", suffix=".json",
+                                     delete=False) as f:
+        f.write(json.dumps(config))
+        config_file = f.name
+
+    # replace network and timing dependencies of WeatherPi.main
+    WeatherPi.weather_forecast = FixtureForecast(
+        args.fixture or ["{}/onecall.json".format(FIXTURES)])
+    WeatherPi.RepeatedTimer = FixtureTimer
+    WeatherPi.FrameScheduler = BenchmarkScheduler
+    WeatherPi.RefreshScheduler = BenchmarkRefreshScheduler
+    WeatherPi.icon_cache = weather_module.icon_cache = FixtureIconCache()
+    BenchmarkScheduler.frames_to_run = args.frames
+    BenchmarkScheduler.fetch_interval = args.fetch_interval
+    BenchmarkScheduler.trace_memory = not args.no_tracemalloc
+
+    # keep stdout for the result
+    logging.basicConfig(level=logging.WARNING,
+                        stream=sys.stderr,
+                        format="%(asctime)s %(levelname)s %(message)s")
+    errors = ErrorCounter()
+    logging.getLogger().addHandler(errors)
+    if BenchmarkScheduler.trace_memory:
+        tracemalloc.start()
+    sys.argv = [os.path.join(ROOT, "WeatherPi.py"), "--config", config_file]
+    try:
+        WeatherPi.main()
+    except SystemExit:
+        pass
+    finally:
+        os.remove(config_file)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    frame_scheduler = BenchmarkScheduler.instance
+    refresh_scheduler = BenchmarkRefreshScheduler.instance
+    if frame_scheduler is None or refresh_scheduler is None:
+        sys.exit("benchmark did not start, see the log above")
+
+    modules = collections.OrderedDict()
+    for i, module in enumerate(refresh_scheduler.modules):
+        name = "{}:{}".format(i, module.__class__.__name__)
+        modules[name] = summary(refresh_scheduler.draw_times[module])
+    frame_latencies = frame_scheduler.frame_latencies
+    result = {
+        "config": args.config,
+        "frames": len(frame_latencies),
+        "frame_ms": summary(frame_latencies),
+        "frames_over_budget":
+        sum(latency * 1000 > args.budget for latency in frame_latencies),
+        "modules": modules,
+        "draw_calls": refresh_scheduler.get_stats(),
+        "text_cache": text_cache.get_stats(),
+        "memory": {
+            "peak_traced_kib":
+            round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            if BenchmarkScheduler.trace_memory else None,
+            "max_rss_kib":
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        },
+        "allocations_per_frame": {
+            "peak_kib":
+            summary(frame_scheduler.frame_allocations, 1 / 1024),
+            "blocks": summary(frame_scheduler.frame_blocks, 1)
+        }
+    }
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    # a broken run must not look like a result
+    if result["frames"] != args.frames or errors.count:
+        sys.exit("benchmark failed: {} of {} frames, {} error(s) logged".
+                 format(result["frames"], args.frames, errors.count))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,15 @@
 import datetime
 import logging
 import time
+import pygame
 from modules.WeatherModule import WeatherModule, Utils
 
 
 class Alerts(WeatherModule):
     """Any severe weather alerts pertinent
     """
+    cadence = "data"
+    sections = ("alerts", )
 
     def draw(self, screen, weather, updated):
         if weather is None:
@@ -21,10 +24,7 @@ class Alerts(WeatherModule):
         self.clear_surface()
         if message:
             logging.info("%s: %s", __class__.__name__, message)
-            for size in ("large", "medium", "small"):
-                width, height = self.text_size(message, size, bold=True)
-                if width <= self.rect.width and height <= self.rect.height:
-                    break
+            size = self.fit_text(message, bold=True)
             self.draw_text(message, (0, 0),
                            size,
                            "red",
@@ -35,27 +35,68 @@ class Alerts(WeatherModule):
 
 class Clock(WeatherModule):
     """Current Date and Time
+
+    The time is drawn from pre-rendered digit glyphs in fixed-width cells,
+    and only the cells whose character changed are drawn. The date line is
+    rendered only when the date changes.
     """
+    cadence = "second"
+
+    def __init__(self, fonts, location, language, units, config):
+        super().__init__(fonts, location, language, units, config)
+        self.date = None
+        self.cells = {}
+
+    def invalidate(self):
+        super().invalidate()
+        self.date = None
+
+    def draw_digits(self, text, position, size, color):
+        """Draw text with the glyph atlas and return changed areas and right
+        """
+        (glyphs, cell_width) = Utils.glyph_atlas(self.fonts["name"],
+                                                 self.fonts["size"][size],
+                                                 True, color)
+        (x, y) = position
+        rects = []
+        for i, char in enumerate(text):
+            glyph = glyphs[char]
+            width = cell_width if char.isdigit() else glyph.get_width()
+            if self.cells.get((position, i)) != char:
+                rect = pygame.Rect(x, y, width, glyph.get_height())
+                self.surface.fill(pygame.Color("black"), rect)
+                self.surface.blit(glyph,
+                                  (x + (width - glyph.get_width()) // 2, y))
+                self.cells[(position, i)] = char
+                rects.append(rect)
+            x += width
+        return rects, x
 
     def draw(self, screen, weather, updated):
         timestamp = time.time()
-        locale_date = Utils.strftime(timestamp, "%a, %x")
-        locale_time = Utils.strftime(timestamp, "%H:%M")
-        locale_second = Utils.strftime(timestamp, " %S")
+        now = time.localtime(timestamp)
 
-        self.clear_surface()
-        self.draw_text(locale_date, (0, 0), "small", "white")
-        (right, _bottom) = self.draw_text(locale_time, (0, 20),
-                                          "large",
-                                          "white",
-                                          bold=True)
-        self.draw_text(locale_second, (right, 20), "medium", "gray", bold=True)
-        self.update_screen(screen)
+        redraw = self.date != now[:3]
+        if redraw:
+            self.date = now[:3]
+            self.cells.clear()
+            self.clear_surface()
+            self.draw_text(Utils.strftime(timestamp, "%a, %x"), (0, 0),
+                           "small", "white")
+
+        top = self.scaled(20)
+        (rects, right) = self.draw_digits(
+            "{:02d}:{:02d}".format(now.tm_hour, now.tm_min), (0, top),
+            "large", "white")
+        (second_rects, _right) = self.draw_digits(
+            " {:02d}".format(now.tm_sec), (right, top), "medium", "gray")
+        self.update_screen(screen, None if redraw else rects + second_rects)
 
 
 class Location(WeatherModule):
     """Current Location
     """
+    cadence = "once"
 
     def draw(self, screen, weather, updated):
         if not self.location["address"]:
@@ -64,11 +105,8 @@ class Location(WeatherModule):
         message = self.location["address"]
 
         self.clear_surface()
-        for size in ("large", "medium", "small"):
-            width, height = self.text_size(message, size)
-            if width <= self.rect.width and height <= self.rect.height:
-                break
-        if width > self.rect.width:
+        size = self.fit_text(message)
+        if self.text_size(message, size)[0] > self.rect.width:
             message = message.split(",")[0]
         self.draw_text(message, (0, 0), size, "white", align="right")
         self.update_screen(screen)
@@ -77,32 +115,38 @@ class Location(WeatherModule):
 class Weather(WeatherModule):
     """Current Weather
     """
+    cadence = "data"
+    sections = ("current", "daily")
 
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
-        self.icon_size = config["icon_size"] if "icon_size" in config else 100
+        self.icon_size = self.scaled(
+            config["icon_size"] if "icon_size" in config else 100)
+
+    def icon_sizes(self):
+        return [self.icon_size]
 
     def draw(self, screen, weather, updated):
         if weather is None or not updated:
             return
 
-        current = weather["current"]
-        daily = weather["daily"][0]
+        current = weather.current
+        daily = weather.daily
 
-        short_summary = _(current["weather"][0]["main"])
-        icon = current["weather"][0]["icon"]
-        temperature = current["temp"]
-        humidity = current["humidity"]
-        feels_like = current["feels_like"]
-        pressure = current["pressure"]
-        uv_index = int(current["uvi"])
-        long_summary = daily["weather"][0]["description"]
-        temperature_high = daily["temp"]["max"]
-        temperature_low = daily["temp"]["min"]
+        short_summary = _(current.condition.main)
+        icon = current.condition.icon
+        temperature = current.temp
+        humidity = current.humidity
+        feels_like = current.feels_like
+        pressure = current.pressure
+        uv_index = int(current.uvi)
+        long_summary = daily.conditions[0].description
+        temperature_high = daily["temp.max"][0]
+        temperature_low = daily["temp.min"][0]
 
         heat_color = Utils.heat_color(temperature, humidity, self.units)
         uv_color = Utils.uv_color(uv_index)
-        weather_icon = Utils.weather_icon(icon, self.icon_size)
+        weather_icon = self.weather_icon(icon, self.icon_size)
 
         temperature = Utils.temperature_text(int(temperature), self.units)
         feels_like = Utils.temperature_text(int(feels_like), self.units)
@@ -133,7 +177,8 @@ class Weather(WeatherModule):
                                                 _("UVindex"), uv_index)
         if self.text_size(message3, "small")[0] > text_width:
             message3 = "{}  {}  UV {}".format(humidity, pressure, uv_index)
-        max_lines = int((self.rect.height - 55) / 15)
+        line_height = self.scaled(15)
+        max_lines = int((self.rect.height - self.scaled(55)) / line_height)
         message4s = self.text_warp(long_summary,
                                    text_width,
                                    "small",
@@ -143,41 +188,51 @@ class Weather(WeatherModule):
         self.clear_surface()
         self.draw_image(weather_icon, (0, 0))
         self.draw_text(message1, (text_x, 0), "medium", heat_color, bold=True)
-        self.draw_text(message2, (text_x, 25), "small", "white")
+        self.draw_text(message2, (text_x, self.scaled(25)), "small", "white")
         i = message3.index("UV")
-        (right, _bottom) = self.draw_text(message3[:i], (text_x, 40), "small",
+        (right, _bottom) = self.draw_text(message3[:i],
+                                          (text_x, self.scaled(40)), "small",
                                           "white")
-        self.draw_text(message3[i:], (right, 40), "small", uv_color, bold=True)
-        height = 55 + (15 * (max_lines - len(message4s))) / 2
+        self.draw_text(message3[i:], (right, self.scaled(40)),
+                       "small",
+                       uv_color,
+                       bold=True)
+        height = self.scaled(55) + (line_height *
+                                    (max_lines - len(message4s))) / 2
         for message in message4s:
             self.draw_text(message, (text_x, height),
                            "small",
                            "white",
                            bold=True)
-            height += 15
+            height += line_height
         self.update_screen(screen)
 
 
 class DailyWeatherForecast(WeatherModule):
     """Daily weather forecast
     """
+    cadence = "data"
+    sections = ("daily", )
 
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
-        self.icon_size = config["icon_size"]
+        self.icon_size = self.scaled(config["icon_size"])
         self.day = config["day"]
 
+    def icon_sizes(self):
+        return [self.icon_size]
+
     def draw(self, screen, weather, updated):
         if weather is None or not updated:
             return
 
-        daily = weather["daily"][self.day]
-        temperature_high = daily["temp"]["max"]
-        temperature_low = daily["temp"]["min"]
-        icon = daily["weather"][0]["icon"]
+        daily = weather.daily
+        temperature_high = daily["temp.max"][self.day]
+        temperature_low = daily["temp.min"][self.day]
+        icon = daily.conditions[self.day].icon
 
-        weather_icon = Utils.weather_icon(icon, self.icon_size)
-        day_of_week = Utils.strftime(daily["dt"], "%a")
+        weather_icon = self.weather_icon(icon, self.icon_size)
+        day_of_week = Utils.strftime(daily.dt[self.day], "%a")
         temperature_low = Utils.temperature_text(int(temperature_low),
                                                  self.units)
         temperature_high = Utils.temperature_text(int(temperature_high),
@@ -186,16 +241,22 @@ class DailyWeatherForecast(WeatherModule):
 
         self.clear_surface()
         self.draw_text(day_of_week, (0, 0), "small", "orange", align="center")
-        self.draw_text(message, (0, 15), "small", "gray", align="center")
+        self.draw_text(message, (0, self.scaled(15)),
+                       "small",
+                       "gray",
+                       align="center")
+        top = self.scaled(30)
         self.draw_image(weather_icon,
-                        ((self.rect.width - self.icon_size) / 2, 30 +
-                         (self.rect.height - 30 - self.icon_size) / 2))
+                        ((self.rect.width - self.icon_size) / 2, top +
+                         (self.rect.height - top - self.icon_size) / 2))
         self.update_screen(screen)
 
 
 class WeatherForecast(WeatherModule):
     """Weather Forecast
     """
+    cadence = "data"
+    sections = ("daily", )
 
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
@@ -213,6 +274,17 @@ class WeatherForecast(WeatherModule):
             self.forecast_modules.append(
                 DailyWeatherForecast(fonts, location, language, units, config))
 
+    def icon_sizes(self):
+        return [
+            size for module in self.forecast_modules
+            for size in module.icon_sizes()
+        ]
+
+    def icon_loaded(self, name, size):
+        return any([
+            module.icon_loaded(name, size) for module in self.forecast_modules
+        ])
+
     def draw(self, screen, weather, updated):
         if weather is None or not updated:
             return
@@ -224,28 +296,39 @@ class WeatherForecast(WeatherModule):
 class SunriseSuset(WeatherModule):
     """Sunrise, Sunset time
     """
+    cadence = "data"
+    sections = ("current", )
 
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
-        self.icon_size = config["icon_size"] if "icon_size" in config else 40
+        self.icon_size = self.scaled(
+            config["icon_size"] if "icon_size" in config else 40)
+
+    def icon_sizes(self):
+        return [self.icon_size]
+
+    def draw_background(self):
+        sun_icon = self.weather_icon("01d", self.icon_size)
+        self.draw_image(sun_icon, ((self.rect.width - self.icon_size) / 2,
+                                   (self.rect.height - self.icon_size) / 2))
 
     def draw(self, screen, weather, updated):
         if weather is None or not updated:
             return
 
-        current = weather["current"]
-        sunrise = current["sunrise"]
-        sunset = current["sunset"]
+        current = weather.current
+        sunrise = current.sunrise
+        sunset = current.sunset
 
         surise = "{} \u2197".format(Utils.strftime(sunrise, "%H:%M"))
         sunset = "\u2198 {}".format(Utils.strftime(sunset, "%H:%M"))
-        sun_icon = Utils.weather_icon("01d", self.icon_size)
 
         self.clear_surface()
-        self.draw_image(sun_icon, ((self.rect.width - self.icon_size) / 2,
-                                   (self.rect.height - self.icon_size) / 2))
-        self.draw_text(surise, (0, 5), "small", "white", align="center")
-        self.draw_text(sunset, (0, self.rect.height - 20),
+        self.draw_text(surise, (0, self.scaled(5)),
+                       "small",
+                       "white",
+                       align="center")
+        self.draw_text(sunset, (0, self.rect.height - self.scaled(20)),
                        "small",
                        "white",
                        align="center")
@@ -255,27 +338,39 @@ class SunriseSuset(WeatherModule):
 class MoonPhase(WeatherModule):
     """Moon Phase
     """
+    cadence = "data"
+    sections = ("current", )
 
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
-        self.icon_size = config["icon_size"] if "icon_size" in config else 50
+        self.icon_size = self.scaled(
+            config["icon_size"] if "icon_size" in config else 50)
+        self.moon_age = None
+
+        # render all ages once, draw() only blits a part of the atlas
+        Utils.moon_atlas(self.icon_size)
 
     def draw(self, screen, weather, updated):
         if weather is None or not updated:
             return
 
-        current = weather["current"]
-        dt = datetime.datetime.fromtimestamp(int(current["dt"]))
+        dt = datetime.datetime.fromtimestamp(int(weather.current.dt))
         moon_age = (
             ((dt.year - 11) % 19) * 11 +
             [0, 2, 0, 2, 2, 4, 5, 6, 7, 8, 9, 10][dt.month - 1] + dt.day) % 30
 
         moon_icon = Utils.moon_icon(moon_age, self.icon_size)
+        if self.moon_age != moon_age:
+            (_atlas, percentages) = Utils.moon_atlas(self.icon_size)
+            logging.info("moon phase age: %s parcentage: %s", moon_age,
+                         percentages[moon_age])
+            self.moon_age = moon_age
         moon_age = str(moon_age)
 
         self.clear_surface()
-        self.draw_image(moon_icon, ((self.rect.width - self.icon_size) / 2, 5))
-        self.draw_text(moon_age, (0, self.rect.height - 20),
+        self.draw_image(moon_icon, ((self.rect.width - self.icon_size) / 2,
+                                    self.scaled(5)))
+        self.draw_text(moon_age, (0, self.rect.height - self.scaled(20)),
                        "small",
                        "white",
                        align="center")
@@ -285,29 +380,40 @@ class MoonPhase(WeatherModule):
 class Wind(WeatherModule):
     """Wind direction, speed
     """
+    cadence = "data"
+    sections = ("current", )
 
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
-        self.icon_size = config["icon_size"] if "icon_size" in config else 30
+        self.icon_size = self.scaled(
+            config["icon_size"] if "icon_size" in config else 30)
+        self.wind_deg = None
 
     def draw(self, screen, weather, updated):
         if weather is None or not updated:
             return
 
-        daily = weather["current"]
-        wind_speed = daily["wind_speed"]
-        wind_deg = daily["wind_deg"]
+        current = weather.current
+        wind_speed = current.wind_speed
+        wind_deg = current.wind_deg
 
         wind_icon = Utils.wind_arrow_icon(wind_deg, self.icon_size)
+        if self.wind_deg != wind_deg:
+            logging.info("wind degree: %s", wind_deg)
+            self.wind_deg = wind_deg
         wind_speed = Utils.speed_text(wind_speed, self.units)
         wind_deg = Utils.wind_bearing_text(wind_deg)
 
         self.clear_surface()
-        self.draw_text(wind_deg, (0, 5), "small", "white", align="center")
+        self.draw_text(wind_deg, (0, self.scaled(5)),
+                       "small",
+                       "white",
+                       align="center")
+        margin = self.scaled(20)
         self.draw_image(wind_icon,
-                        ((self.rect.width - self.icon_size) / 2, 20 +
-                         (self.rect.height - 40 - self.icon_size) / 2))
-        self.draw_text(wind_speed, (0, self.rect.height - 20),
+                        ((self.rect.width - self.icon_size) / 2, margin +
+                         (self.rect.height - 2 * margin - self.icon_size) / 2))
+        self.draw_text(wind_speed, (0, self.rect.height - self.scaled(20)),
                        "small",
                        "white",
                        align="center")
@@ -1,11 +1,14 @@
-# pylint: disable=invalid-name
+# pylint: disable=invalid-name, broad-except
 """Covid-19 module
 """
 
 import datetime
+import io
+import logging
 import pandas as pd
 from modules.WeatherModule import WeatherModule
 from modules.GraphUtils import GraphUtils
+from modules.SessionPool import session_pool
 
 
 class Covid19Japan(WeatherModule):
@@ -21,6 +24,8 @@ class Covid19Japan(WeatherModule):
       }
      }
     """
+    cadence = "data"
+
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
         self.days_ago = config["days_ago"] if "days_ago" in config else 0
@@ -31,9 +36,11 @@ class Covid19Japan(WeatherModule):
 
         try:
             # Retrieve the data
-            df = pd.read_csv(
+            response = session_pool.get(
                 "https://dl.dropboxusercontent.com/s/6mztoeb6xf78g5w/COVID-19.csv"
             )
+            response.raise_for_status()
+            df = pd.read_csv(io.BytesIO(response.content))
             df["確定日"] = pd.to_datetime(df["確定日"])
             df["人数"] = 1
             new_cases = pd.DataFrame(df.groupby("確定日").sum()["人数"])
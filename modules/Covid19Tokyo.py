@@ -1,11 +1,14 @@
-# pylint: disable=invalid-name
+# pylint: disable=invalid-name, broad-except
 """Covid-19 module
 """
 
 import datetime
+import io
+import logging
 import pandas as pd
 from modules.WeatherModule import WeatherModule
 from modules.GraphUtils import GraphUtils
+from modules.SessionPool import session_pool
 
 
 class Covid19Tokyo(WeatherModule):
@@ -22,6 +25,8 @@ class Covid19Tokyo(WeatherModule):
       }
      }
     """
+    cadence = "data"
+
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
         self.days_ago = config["days_ago"] if "days_ago" in config else 0
@@ -32,8 +37,11 @@ class Covid19Tokyo(WeatherModule):
 
         try:
             # Retrieve the data
-            df = pd.read_csv(("https://stopcovid19.metro.tokyo.lg.jp"
-                              "/data/130001_tokyo_covid19_patients.csv"))
+            response = session_pool.get(
+                "https://stopcovid19.metro.tokyo.lg.jp"
+                "/data/130001_tokyo_covid19_patients.csv")
+            response.raise_for_status()
+            df = pd.read_csv(io.BytesIO(response.content))
             df["公表_年月日"] = pd.to_datetime(df["公表_年月日"])
             df["人数"] = 1
             new_cases = pd.DataFrame(df.groupby("公表_年月日").sum()["人数"])
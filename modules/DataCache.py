@@ -0,0 +1,71 @@
+# pylint: disable=invalid-name, broad-except
+"""Persistent data cache
+"""
+
+import json
+import logging
+import os
+import tempfile
+import time
+
+
+class DataCache:
+    """
+    Persistent on-disk cache of the last good response
+
+    The file is replaced atomically, so a power cut while writing leaves
+    the previous response in place. A key (e.g. location, language, units)
+    is stored with the data and a cached response is used only if the key
+    matches.
+    """
+
+    def __init__(self, file, key=None):
+        self.file = file
+        self.key = key
+
+    def load(self):
+        """Load the cached data, None if missing, broken or for another key
+        """
+        try:
+            with open(self.file, "r") as f:
+                cache = json.loads(f.read())
+            if cache["key"] != self.key:
+                logging.info("%s: cache key changed", self.file)
+                return None
+            logging.info("%s: cached data loaded. age: %ds", self.file,
+                         time.time() - cache["fetched_at"])
+            return cache["data"]
+
+        except FileNotFoundError:
+            return None
+
+        except Exception as e:
+            logging.error(e, exc_info=True)
+            return None
+
+    def save(self, data, fetched_at=None):
+        """Save the data with its fetch time atomically
+        """
+        temp_file = None
+        try:
+            cache = {
+                "key": self.key,
+                "fetched_at": fetched_at if fetched_at else time.time(),
+                "data": data
+            }
+            directory = os.path.dirname(os.path.abspath(self.file))
+            os.makedirs(directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile("w",
+                                             dir=directory,
+                                             suffix=".tmp",
+                                             delete=False) as f:
+                temp_file = f.name
+                f.write(json.dumps(cache))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.file)
+
+        except Exception as e:
+            logging.error(e, exc_info=True)
+            if temp_file and os.path.exists(temp_file):
+                os.remove(temp_file)
@@ -105,28 +105,16 @@ class DigisparkTemper(TemperatureModule):
             self.units)
         humidity = Utils.percentage_text(humidity)
 
-        for size in ("large", "medium", "small"):
-            # Horizontal
-            message1 = "{}  {}".format(temperature, humidity)
-            message2 = None
-            w, h = self.text_size(message1, size, bold=True)
-            if w <= self.rect.width and 20 + h <= self.rect.height:
-                break
-
-            # Vertical
-            message1 = temperature
-            message2 = humidity if humidity else None
-            w1, h1 = self.text_size(message1, size, bold=True)
-            w2, h2 = self.text_size(message2, size, bold=True)
-            if max(w1,
-                   w2) <= self.rect.width and 20 + h1 + h2 <= self.rect.height:
-                break
+        top = self.scaled(20)
+        (size, lines) = self.fit_lines("{}  {}".format(temperature, humidity),
+                                       [temperature, humidity],
+                                       bold=True,
+                                       top=top)
 
         self.clear_surface()
-        self.draw_text(_("Indoor"), (0, 0), "small", "gray")
-        (w, h) = self.draw_text(message1, (0, 20), size, color, bold=True)
-        if message2:
-            self.draw_text(message2, (0, 20 + h), size, color, bold=True)
+        (_w, h) = self.draw_text(lines[0], (0, top), size, color, bold=True)
+        if len(lines) > 1 and lines[1]:
+            self.draw_text(lines[1], (0, top + h), size, color, bold=True)
         self.update_screen(screen)
 
         # draw the graph if necessary
@@ -0,0 +1,76 @@
+# pylint: disable=invalid-name
+"""Persistent font resolution cache
+"""
+
+import logging
+import os
+import pygame
+from modules.DataCache import DataCache
+
+
+class FontCache:
+    """
+    Font name to font file resolution, cached on disk
+
+    pygame.font.SysFont scans all system fonts on first use, which takes
+    seconds with large CJK fonts installed. Resolved paths are kept in a
+    file and reused as long as the modification times of the font
+    directories are unchanged.
+    """
+    directories = [
+        "/usr/share/fonts", "/usr/local/share/fonts", "~/.fonts",
+        "~/.local/share/fonts"
+    ]
+
+    def __init__(self, file=None):
+        self.file = file
+        self.fonts = None
+        self.data_cache = None
+
+    def configure(self, file):
+        """Change the cache file
+        """
+        self.file = file
+        self.fonts = None
+        self.data_cache = None
+
+    def signature(self):
+        """Return the modification times of the font directories
+        """
+        mtimes = {}
+        for directory in self.directories:
+            for root, _dirs, _files in os.walk(os.path.expanduser(directory)):
+                mtimes[root] = os.stat(root).st_mtime_ns
+        return mtimes
+
+    def resolve(self, name, bold):
+        """Return the font file and whether bold has to be emulated
+
+        The system fonts are scanned only when the font is not cached.
+        """
+        if self.fonts is None:
+            # cached fonts are valid while the font directories are unchanged
+            if self.file:
+                self.data_cache = DataCache(self.file, self.signature())
+                self.fonts = self.data_cache.load()
+            if self.fonts is None:
+                self.fonts = {}
+
+        key = "{}:{}".format(name, "bold" if bold else "regular")
+        if key not in self.fonts:
+            # same resolution as pygame.font.SysFont
+            path, set_bold = pygame.font.SysFont(
+                name,
+                0,
+                bold,
+                constructor=lambda path, _size, set_bold, _italic:
+                (path, set_bold))
+            self.fonts[key] = [path, set_bold]
+            logging.info("font %s resolved: %s", key, path)
+            if self.data_cache:
+                self.data_cache.save(self.fonts)
+        return tuple(self.fonts[key])
+
+
+# shared font cache
+font_cache = FontCache()
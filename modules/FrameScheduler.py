@@ -0,0 +1,112 @@
+# pylint: disable=invalid-name
+"""FrameScheduler class
+"""
+
+import collections
+import logging
+import math
+import time
+import pygame
+
+# pygame.event.wait(timeout) needs pygame 2.0.1, older versions poll events
+EVENT_WAIT_TIMEOUT = tuple(pygame.version.vernum) >= (2, 0, 1)
+POLL_INTERVAL = 0.05
+
+
+class FrameScheduler:
+    """Main loop pacing aligned to wall-clock seconds
+
+    wait() sleeps until the next second boundary, but returns immediately
+    when a pygame event (touch, display sleep/wakeup, new data, ...) arrives.
+    Frame pacing statistics are collected on every second boundary.
+    """
+
+    def __init__(self):
+        self.next_tick = math.floor(time.time()) + 1
+        self.last_second = None
+        self.started = time.time()
+        self.frames = 0
+        self.frame_times = collections.deque(maxlen=61)
+        self.ticks = 0
+        self.skipped_seconds = 0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+
+    def wait(self):
+        """Wait for the next second boundary or pygame events
+
+        Returns a tuple (tick, events). tick is True when a new wall-clock
+        second has started, events is the list of received pygame events.
+        """
+        events = pygame.event.get()
+        while not events:
+            now = self.check_clock()
+            timeout = self.next_tick - now
+            if timeout <= 0:
+                break
+            # at most a second, so a clock change is noticed
+            timeout = min(timeout, 1)
+            if EVENT_WAIT_TIMEOUT:
+                event = pygame.event.wait(max(1, math.ceil(timeout * 1000)))
+                if event.type != pygame.NOEVENT:
+                    events = [event] + pygame.event.get()
+            else:
+                time.sleep(min(timeout, POLL_INTERVAL))
+                events = pygame.event.get()
+
+        self.frames += 1
+        now = self.check_clock()
+        self.frame_times.append(now)
+        if now < self.next_tick:
+            return False, events
+
+        second = math.floor(now)
+        if self.last_second is not None and second - self.last_second > 1:
+            skipped = second - self.last_second - 1
+            self.skipped_seconds += skipped
+            logging.warning("frame scheduler: %s second(s) skipped", skipped)
+        lateness = now - second
+        self.total_lateness += lateness
+        self.max_lateness = max(self.max_lateness, lateness)
+        self.ticks += 1
+        self.last_second = second
+        self.next_tick = second + 1
+        return True, events
+
+    def check_clock(self):
+        """Return the time, restarting the seconds if the clock went back
+
+        A Raspberry Pi has no RTC, so NTP or fake-hwclock can set the clock
+        back by minutes or hours.
+        """
+        now = time.time()
+        if now < self.next_tick - 1:
+            logging.warning("frame scheduler: clock set back %.1f second(s)",
+                            self.next_tick - 1 - now)
+            self.next_tick = math.floor(now) + 1
+            self.last_second = None
+            self.frame_times.clear()
+        return now
+
+    def get_frame_rate(self):
+        """get the frame rate of the recent frames
+        """
+        if len(self.frame_times) < 2:
+            return 0
+        elapsed = self.frame_times[-1] - self.frame_times[0]
+        return (len(self.frame_times) - 1) / elapsed if elapsed > 0 else 0
+
+    def get_stats(self):
+        """get frame pacing statistics
+        """
+        elapsed = time.time() - self.started
+        return {
+            "elapsed": round(elapsed, 3),
+            "frames": self.frames,
+            "ticks": self.ticks,
+            "skipped_seconds": self.skipped_seconds,
+            "mean_lateness":
+            round(self.total_lateness / self.ticks, 6) if self.ticks else 0,
+            "max_lateness": round(self.max_lateness, 6),
+            "fps": round(self.frames / elapsed, 2) if elapsed > 0 else 0
+        }
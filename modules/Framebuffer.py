@@ -0,0 +1,151 @@
+# pylint: disable=invalid-name, too-many-instance-attributes, too-many-locals
+"""Direct framebuffer output
+"""
+
+import logging
+import mmap
+import os
+import numpy as np
+import pygame
+
+
+def read_sysfs(device, name):
+    """Read a framebuffer attribute from sysfs
+    """
+    path = "/sys/class/graphics/{}/{}".format(os.path.basename(device), name)
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except IOError:
+        return None
+
+
+class Framebuffer:
+    """
+    Write the screen surface straight into a memory-mapped framebuffer
+
+    Pixels are converted to the framebuffer format (RGB565 or XRGB8888) with
+    numpy, and only the tiles whose contents changed since the last frame are
+    written. A regular file can be used in place of /dev/fbN; it is created
+    if missing and its geometry is then taken from the screen size.
+
+    example config:
+    {
+      "framebuffer": "/dev/fb1",
+      ...
+    }
+    """
+
+    def __init__(self, device, size, *, bpp=16, tile_size=16):
+        virtual_size = read_sysfs(device, "virtual_size")
+        if virtual_size:
+            size = tuple(map(int, virtual_size.split(",")))
+            bpp = int(read_sysfs(device, "bits_per_pixel"))
+        if bpp not in (16, 32):
+            raise ValueError("{}: {}bpp is not supported".format(device, bpp))
+        (self.width, self.height) = size
+        self.dtype = np.uint16 if bpp == 16 else np.uint32
+        stride = read_sysfs(device, "stride")
+        stride = int(stride) if stride else self.width * bpp // 8
+        self.tile_size = tile_size
+
+        flags = os.O_RDWR
+        if not device.startswith("/dev/"):
+            # a file standing in for /dev/fbN (a missing device is an error)
+            flags |= os.O_CREAT
+        self.fd = os.open(device, flags, 0o644)
+        length = stride * self.height
+        if os.fstat(self.fd).st_size < length and os.path.isfile(device):
+            os.ftruncate(self.fd, length)
+        self.mm = mmap.mmap(self.fd, length)
+        self.frame = np.ndarray((self.height, stride * 8 // bpp),
+                                dtype=self.dtype,
+                                buffer=self.mm)[:, :self.width]
+        self.last = np.array(self.frame)
+        self.written_tiles = 0
+        logging.info("framebuffer %s %sx%s %sbpp opened", device, self.width,
+                     self.height, bpp)
+
+    def close(self):
+        """Unmap and close the framebuffer
+        """
+        self.frame = None
+        self.mm.close()
+        os.close(self.fd)
+
+    def convert(self, surface, rect):
+        """Convert a screen area to the framebuffer pixel format
+        """
+        if surface.get_bitsize() == 32 and surface.get_masks()[:3] == (
+                0xff0000, 0xff00, 0xff):
+            # XRGB8888 surface: shift the packed pixels in one pass
+            pixels = pygame.surfarray.pixels2d(surface)
+            area = pixels[rect.left:rect.right, rect.top:rect.bottom].T
+            if self.dtype == np.uint32:
+                converted = area & 0xffffff
+            else:
+                converted = (((area >> 8) & 0xf800) | ((area >> 5) & 0x07e0)
+                             | ((area >> 3) & 0x001f)).astype(np.uint16)
+        else:
+            if surface.get_bytesize() in (3, 4):
+                pixels = pygame.surfarray.pixels3d(surface)
+                area = pixels[rect.left:rect.right,
+                              rect.top:rect.bottom].transpose(1, 0, 2)
+            else:
+                # 8 and 16-bit surfaces have no RGB view: copy the area
+                pixels = pygame.surfarray.array3d(surface.subsurface(rect))
+                area = pixels.transpose(1, 0, 2)
+            r = area[..., 0].astype(self.dtype)
+            g = area[..., 1].astype(self.dtype)
+            b = area[..., 2].astype(self.dtype)
+            if self.dtype == np.uint32:
+                converted = (r << 16) | (g << 8) | b
+            else:
+                converted = ((r & 0xf8) << 8) | ((g & 0xfc) << 3) | (b >> 3)
+        del pixels
+        return converted
+
+    def update(self, surface, rects=None):
+        """Write the changed tiles of the given screen areas
+        """
+        bounds = pygame.Rect(0, 0, self.width, self.height).clip(
+            surface.get_rect())
+        if rects is None:
+            rects = [bounds]
+        tile = self.tile_size
+        written = 0
+        for rect in rects:
+            # align to the tile grid
+            rect = pygame.Rect(rect).clip(bounds)
+            if not rect.width or not rect.height:
+                continue
+            left = rect.left // tile * tile
+            top = rect.top // tile * tile
+            right = min(-(-rect.right // tile) * tile, bounds.right)
+            bottom = min(-(-rect.bottom // tile) * tile, bounds.bottom)
+            rect = pygame.Rect(left, top, right - left, bottom - top)
+
+            # changed tiles
+            new = self.convert(surface, rect)
+            old = self.last[top:bottom, left:right]
+            rows = -(-rect.height // tile)
+            cols = -(-rect.width // tile)
+            diff = np.zeros((rows * tile, cols * tile), dtype=bool)
+            diff[:rect.height, :rect.width] = new != old
+            changed = diff.reshape(rows, tile, cols, tile).any(axis=(1, 3))
+
+            # write runs of changed tiles row by row
+            for row in np.flatnonzero(changed.any(axis=1)):
+                y0 = row * tile
+                y1 = min(y0 + tile, rect.height)
+                flags = np.concatenate(([False], changed[row], [False]))
+                edges = np.flatnonzero(flags[1:] != flags[:-1])
+                for start, end in zip(edges[::2], edges[1::2]):
+                    x0 = start * tile
+                    x1 = min(end * tile, rect.width)
+                    self.frame[top + y0:top + y1,
+                               left + x0:left + x1] = new[y0:y1, x0:x1]
+                    old[y0:y1, x0:x1] = new[y0:y1, x0:x1]
+                    written += end - start
+        self.written_tiles += written
+        return written
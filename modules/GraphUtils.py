@@ -2,8 +2,8 @@
 """ Glaph utility class
 """
 
-import io
 import logging
+import operator
 import threading
 import time
 import numpy as np
@@ -11,7 +11,14 @@ import pygame
 import matplotlib
 import matplotlib.pyplot as plt
 from matplotlib import font_manager
-from matplotlib.dates import DateFormatter, DayLocator, HourLocator
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.dates import (AutoDateLocator, DateFormatter, DayLocator,
+                              HourLocator, date2num)
+from matplotlib.figure import Figure
+from matplotlib.ticker import NullLocator
+from modules.FontCache import font_cache
+from modules.ImageUtils import display_format
+from modules.WeatherModule import Utils
 
 # matplotlib parameters
 matplotlib.pyplot.switch_backend("Agg")
@@ -38,10 +45,10 @@ def synchronized(wrapped):
     return decorator
 
 
-@synchronized
-def _draw_2axis_graph(screen, surface, rect, times, y1, ylabel1, y2, ylabel2,
-                      title, yscale1, yscale2):
-    # plot graph
+def plot_2axis_graph(rect, times, y1, ylabel1, y2, ylabel2, title, yscale1,
+                     yscale2):
+    """plot a 2-axis graph in a new figure of the rect size
+    """
     fig, ax1 = plt.subplots(figsize=(rect.width / dpi, rect.height / dpi))
     if title:
         plt.title(title)
@@ -63,41 +70,181 @@ def _draw_2axis_graph(screen, surface, rect, times, y1, ylabel1, y2, ylabel2,
         if sum(x is not np.nan for x in y2) > 0:
             ax2.plot(times, y2, color=colormap(1))
 
-    # setting tics
-    ax1.xaxis.set_major_formatter(DateFormatter("%m-%d"))
-    if (max(times) - min(times)).days <= 7:
-        if (max(times) - min(times)).days > 1:
-            ax1.xaxis.set_major_locator(DayLocator())
-            ax1.xaxis.set_minor_locator(HourLocator(interval=6))
-        else:
-            ax1.xaxis.set_major_locator(HourLocator(interval=24))
-            ax1.xaxis.set_minor_locator(HourLocator(interval=6))
+    set_time_ticks(ax1, times)
+    plt.tight_layout()
+    return fig
+
+
+def set_time_ticks(ax, times):
+    """set the time axis formatter and locators for the span of times
+    """
+    ax.xaxis.set_major_formatter(DateFormatter("%m-%d"))
+    days = (max(times) - min(times)).days
+    if days > 7:
+        ax.xaxis.set_major_locator(AutoDateLocator())
+        ax.xaxis.set_minor_locator(NullLocator())
+    elif days > 1:
+        ax.xaxis.set_major_locator(DayLocator())
+        ax.xaxis.set_minor_locator(HourLocator(interval=6))
+    else:
+        ax.xaxis.set_major_locator(HourLocator(interval=24))
+        ax.xaxis.set_minor_locator(HourLocator(interval=6))
+
+
+def figure_to_surface(fig):
+    """render a figure and convert the Agg RGBA buffer to a surface
+
+    The buffer is wrapped without PNG encoding and decoding.
+    """
+    canvas = fig.canvas
+    canvas.draw()
+    return display_format(
+        pygame.image.frombuffer(canvas.buffer_rgba(),
+                                canvas.get_width_height(), "RGBA"))
+
+
+def same_array(a, b):
+    """compare two arrays (or None) treating NaN as equal
+    """
+    if a is None or b is None:
+        return a is b
+    return np.array_equal(a, b, equal_nan=True)
+
+
+class TwoAxisGraph:
+    """
+    2-axis graph that keeps its figure, axes and lines between draws
+
+    An axis is created for each label that is not None. The axes layout is
+    computed with the first data, and again only if the tick labels no
+    longer fit. update() only sets the line data and rescales the axes,
+    and the canvas is redrawn only when the data has changed.
+    """
+
+    def __init__(self, rect, ylabel1, ylabel2, *, yscale1=None, yscale2=None):
+        self.figure = Figure(figsize=(rect.width / dpi, rect.height / dpi),
+                             dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        ax1 = self.figure.add_subplot()
+        ax1.xaxis_date()
+        self.axes = []
+        axes = ((ylabel1, yscale1), (ylabel2, yscale2))
+        for i, (ylabel, yscale) in enumerate(axes):
+            if ylabel is None:
+                self.axes.append(None)
+                continue
+            ax = ax1 if i == 0 else ax1.twinx()
+            ax.yaxis.label.set_color(colormap(i))
+            ax.set_ylabel(ylabel)
+            if yscale:
+                ax.set_yscale(yscale)
+            (line, ) = ax.plot([], [], color=colormap(i))
+            self.axes.append((ax, line))
+        self.data = None
+        self.image = None
+        self.lengths = None
+
+    def update(self, times, y1, y2):
+        """set the data of the lines, return whether it has changed
+        """
+        data = [np.asarray(date2num(times), dtype=np.float64)] + [
+            None if y is None else np.asarray(y, dtype=np.float64)
+            for y in (y1, y2)
+        ]
+        if self.data is not None and all(map(same_array, self.data, data)):
+            return False
+
+        for axis, y in zip(self.axes, data[1:]):
+            if axis is not None:
+                (ax, line) = axis
+                line.set_data(data[0], [] if y is None else y)
+                ax.relim()
+                ax.autoscale_view()
+        set_time_ticks(self.figure.axes[0], times)
+        if self.data is None:
+            self.figure.tight_layout()
+        self.data = data
+        self.image = None
+        return True
+
+    def label_lengths(self):
+        """get the longest y tick label of each axis (as last drawn)
+        """
+        return [
+            max((len(label.get_text()) for label in ax.get_yticklabels()),
+                default=0) for ax in self.figure.axes
+        ]
+
+    def render(self):
+        """get the graph image, redrawing the canvas if it has changed
+        """
+        if self.image is None:
+            self.canvas.draw()
+            lengths = self.label_lengths()
+            if self.lengths is None:
+                self.lengths = lengths
+            elif any(map(operator.gt, lengths, self.lengths)):
+                # tick labels have grown (e.g. more digits)
+                self.figure.tight_layout()
+                self.canvas.draw()
+                self.lengths = self.label_lengths()
+            self.image = display_format(
+                pygame.image.frombuffer(self.canvas.buffer_rgba(),
+                                        self.canvas.get_width_height(),
+                                        "RGBA"))
+        return self.image
+
+
+@synchronized
+def _draw_retained_graph(screen, surface, rect, graph, times, y1, y2):
+    # update lines (the canvas is kept when the data is the same)
+    graph.update(times, y1, y2)
+
+    # draw image
+    surface.blit(graph.render(), (0, 0))
+    screen.blit(surface, (rect.left, rect.top))
+    Utils.add_dirty_rect(rect)
+
+
+@synchronized
+def _draw_2axis_graph(screen, surface, rect, times, y1, ylabel1, y2, ylabel2,
+                      title, yscale1, yscale2):
+    # plot graph
+    fig = plot_2axis_graph(rect, times, y1, ylabel1, y2, ylabel2, title,
+                           yscale1, yscale2)
 
     # convert to pygame image
-    f = io.BytesIO()
-    plt.tight_layout()
-    plt.savefig(f, format="png")
+    image = figure_to_surface(fig)
     plt.close(fig)
-    f.seek(0)
-    image = pygame.image.load(f)
 
     # draw image
     surface.blit(image, (0, 0))
     screen.blit(surface, (rect.left, rect.top))
+    Utils.add_dirty_rect(rect)
 
 
 class GraphUtils:
     """Graph Utility class
     """
 
+    # matplotlib family names of the registered fonts
+    families = {}
+
     @staticmethod
     def set_font(font):
         """set graph text font
         """
-        if font not in plt.rcParams["font.family"]:
-            font_manager.fontManager.ttflist.extend(
-                font_manager.createFontList(font_manager.findSystemFonts()))
-            plt.rcParams["font.family"] = font
+        if font not in GraphUtils.families:
+            # register the font files resolved for pygame
+            family = font
+            for bold in (True, False):
+                (path, _set_bold) = font_cache.resolve(font, bold)
+                if path:
+                    font_manager.fontManager.addfont(path)
+                    family = font_manager.FontProperties(
+                        fname=path).get_name()
+            GraphUtils.families[font] = family
+        plt.rcParams["font.family"] = GraphUtils.families[font]
 
     @staticmethod
     def draw_2axis_graph(screen,
@@ -117,3 +264,11 @@ class GraphUtils:
         threading.Thread(target=_draw_2axis_graph,
                          args=(screen, surface, rect, times, y1, ylabel1, y2,
                                ylabel2, title, yscale1, yscale2)).start()
+
+    @staticmethod
+    def draw_retained_graph(screen, surface, rect, graph, times, y1, y2):
+        """update a TwoAxisGraph and draw it in another thread
+        """
+        threading.Thread(target=_draw_retained_graph,
+                         args=(screen, surface, rect, graph, times, y1,
+                               y2)).start()
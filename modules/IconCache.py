@@ -0,0 +1,179 @@
+# pylint: disable=invalid-name, broad-except
+"""Weather icon cache
+"""
+
+import io
+import logging
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from modules.ImageUtils import pil_to_surface
+from modules.SessionPool import session_pool
+
+# OpenWeather icon codes
+ICON_CODES = [
+    "{}{}".format(code, time) for code in ("01", "02", "03", "04", "09",
+                                           "10", "11", "13", "50")
+    for time in ("d", "n")
+]
+
+
+def save_image(image, file):
+    """Save an image atomically
+    """
+    directory = os.path.dirname(file)
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=directory,
+                                     suffix=".tmp",
+                                     delete=False) as f:
+        temp_file = f.name
+        image.save(f, "PNG")
+    os.replace(temp_file, file)
+
+
+class IconCache:
+    """
+    Weather icons loaded in the background and cached on disk
+
+    Icons are looked up in the icons folder, then in the cache directory,
+    and downloaded from OpenWeather if missing. Downloaded originals and
+    their resized variants are kept in the cache directory (icons in the
+    icons folder are resized on load, so replacing them takes effect).
+    get() never blocks: it returns None and loads the icon in the
+    background, then calls on_loaded(name, size) so the screen can be
+    redrawn.
+    """
+
+    def __init__(self, directory=None, max_workers=2):
+        self.directory = directory
+        self.max_workers = max_workers
+        self.images = {}
+        self.pending = set()
+        self.waiting = set()
+        self.lock = threading.Lock()
+        self.executor = None
+        self.on_loaded = None
+
+    def configure(self, directory, on_loaded=None):
+        """Change the cache directory and the loaded callback
+        """
+        self.directory = directory
+        self.on_loaded = on_loaded
+
+    def get(self, name, size):
+        """Return the icon, or None while it is being loaded
+        """
+        with self.lock:
+            image = self.images.get((name, size))
+            if image is not None:
+                return image
+            self.waiting.add((name, size))
+        self.load_async(name, [size])
+        return None
+
+    def prewarm(self, sizes):
+        """Load all OpenWeather icons in the given sizes in the background
+        """
+        if sizes:
+            logging.info("icon cache prewarm. sizes: %s", sorted(sizes))
+            for name in ICON_CODES:
+                self.load_async(name, sorted(sizes))
+
+    def load_async(self, name, sizes):
+        """Queue loading the sizes of an icon that are not loaded yet
+        """
+        with self.lock:
+            sizes = [
+                size for size in sizes if (name, size) not in self.images
+                and (name, size) not in self.pending
+            ]
+            if not sizes:
+                return
+            self.pending.update((name, size) for size in sizes)
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="icon")
+        self.executor.submit(self.load, name, sizes)
+
+    def file(self, name, size=None):
+        """Return the cache file of an original (size None) or resized icon
+        """
+        if size is None:
+            return "{}/{}.png".format(self.directory, name)
+        return "{}/{}@{}.png".format(self.directory, name, size)
+
+    @staticmethod
+    def custom_file(name):
+        """Return the icon file in the icons folder
+        """
+        return "{}/icons/{}.png".format(sys.path[0], name)
+
+    def original(self, name):
+        """Open the original icon from disk, or download it
+        """
+        if os.path.isfile(self.custom_file(name)):
+            return Image.open(self.custom_file(name))
+        if self.directory and os.path.isfile(self.file(name)):
+            return Image.open(self.file(name))
+
+        response = session_pool.get(
+            "http://openweathermap.org/img/wn/{}@2x.png".format(name))
+        response.raise_for_status()
+        image = Image.open(io.BytesIO(response.content))
+        if self.directory:
+            save_image(image, self.file(name))
+        return image
+
+    def load(self, name, sizes):
+        """Worker: load the sizes of an icon
+        """
+        image = None
+        cached = self.directory and not os.path.isfile(self.custom_file(name))
+        for size in sizes:
+            try:
+                resized_file = self.file(name, size) if cached else None
+                if resized_file and os.path.isfile(resized_file):
+                    resized = Image.open(resized_file)
+                else:
+                    if image is None:
+                        image = self.original(name)
+                    (width, height) = image.size
+                    if width >= height:
+                        (width, height) = (size, int(size / width * height))
+                    else:
+                        (width, height) = (int(size / width * height), size)
+                    resized = image.resize((width, height), Image.LANCZOS)
+                    if resized_file:
+                        save_image(resized, resized_file)
+
+                surface = pil_to_surface(resized)
+                with self.lock:
+                    self.images[(name, size)] = surface
+                    waiting = (name, size) in self.waiting
+                    self.waiting.discard((name, size))
+                logging.debug("weather icon %s %s loaded", name, size)
+                if waiting and self.on_loaded:
+                    # a placeholder is on the screen
+                    self.on_loaded(name, size)
+
+            except Exception as e:
+                logging.error("weather icon %s %s: %s", name, size, e)
+                if image is None:
+                    # the other sizes would fail the same way
+                    break
+
+        with self.lock:
+            self.pending.difference_update((name, size) for size in sizes)
+
+    def quit(self):
+        """Cancel the icons not loaded yet
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# shared icon cache
+icon_cache = IconCache()
@@ -0,0 +1,31 @@
+# pylint: disable=invalid-name
+"""Image conversion utility
+"""
+
+import pygame
+
+
+def display_format(surface):
+    """Convert a surface to the pixel format of the display
+
+    Blits between surfaces of the same format are plain copies, others are
+    converted pixel by pixel on every blit. Surfaces are returned as they
+    are while no display mode is set (e.g. in benchmarks).
+    """
+    if pygame.display.get_surface() is None:
+        return surface
+    if surface.get_flags() & pygame.SRCALPHA:
+        return surface.convert_alpha()
+    return surface.convert()
+
+
+def pil_to_surface(image):
+    """Convert a PIL image to a surface in the display format
+
+    The pixels are copied out of PIL once and wrapped by frombuffer without
+    another copy before they are converted to the display format.
+    """
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+    surface = pygame.image.frombuffer(image.tobytes(), image.size, image.mode)
+    return display_format(surface)
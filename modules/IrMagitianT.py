@@ -72,14 +72,11 @@ class IrMagitianT(TemperatureModule):
             self.units)
 
         message = temparature
-        for size in ("large", "medium", "small"):
-            w, h = self.text_size(message, size, bold=True)
-            if w <= self.rect.width and 20 + h <= self.rect.height:
-                break
+        top = self.scaled(20)
+        size = self.fit_text(message, bold=True, top=top)
 
         self.clear_surface()
-        self.draw_text(_("Indoor"), (0, 0), "small", "gray")
-        self.draw_text(message, (0, 20), size, "white", bold=True)
+        self.draw_text(message, (0, top), size, "white", bold=True)
         self.update_screen(screen)
 
         # draw the graph if necessary
@@ -4,9 +4,9 @@
 
 import logging
 from xml.etree import ElementTree as et
-import requests
 from modules.WeatherModule import WeatherModule
 from modules.RepeatedTimer import RepeatedTimer
+from modules.SessionPool import session_pool
 
 
 def weather_alerts(prefectures, city):
@@ -14,7 +14,7 @@ def weather_alerts(prefectures, city):
     """
 
     try:
-        response = requests.get(
+        response = session_pool.get(
             "https://www.data.jma.go.jp/developer/xml/feed/extra.xml")
         response.raise_for_status()
 
@@ -29,7 +29,7 @@ def weather_alerts(prefectures, city):
         if not url:
             return None
 
-        response = requests.get(url)
+        response = session_pool.get(url)
         response.raise_for_status()
 
         data = et.fromstring(response.content)
@@ -66,6 +66,7 @@ class JMAAlerts(WeatherModule):
 
     参考：http://xml.kishou.go.jp/xmlpull.html
     """
+    cadence = "data"
 
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
@@ -107,10 +108,7 @@ class JMAAlerts(WeatherModule):
                 color = "yellow"
             else:
                 color = "white"
-            for size in ("large", "medium", "small"):
-                w, h = self.text_size(message, size, bold=True)
-                if w <= self.rect.width and h <= self.rect.height:
-                    break
+            size = self.fit_text(message, bold=True)
             self.draw_text(message, (0, 0),
                            size,
                            color,
@@ -4,6 +4,7 @@
 
 import logging
 import socket
+import time
 from modules.WeatherModule import WeatherModule, Utils
 
 
@@ -34,9 +35,11 @@ class LocalAddress(WeatherModule):
        }
     }
     """
+    cadence = "minute"
+
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
-        self.seconds = 0
+        self.lost_time = None
         self.seconds_to_reboot = 0
         if isinstance(config["seconds_to_reboot"], int):
             self.seconds_to_reboot = config["seconds_to_reboot"]
@@ -44,19 +47,18 @@ class LocalAddress(WeatherModule):
     def draw(self, screen, weather, updated):
         message = get_local_address()
         if message:
-            self.seconds = 0
+            self.lost_time = None
         else:
             message = "connection lost"
-            self.seconds += 1
-            if self.seconds_to_reboot and self.seconds > self.seconds_to_reboot:
+            if self.lost_time is None:
+                self.lost_time = time.time()
+            seconds = time.time() - self.lost_time
+            if self.seconds_to_reboot and seconds > self.seconds_to_reboot:
                 Utils.reboot()
 
         self.clear_surface()
         logging.info("%s: %s", __class__.__name__, message)
-        for size in ("large", "medium", "small"):
-            width, height = self.text_size(message, size, bold=True)
-            if width <= self.rect.width and height <= self.rect.height:
-                break
+        size = self.fit_text(message, bold=True)
         self.draw_text(message, (0, 0),
                        size,
                        "white",
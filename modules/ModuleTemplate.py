@@ -8,6 +8,7 @@ from modules.WeatherModule import WeatherModule
 class ModuleTemplate(WeatherModule):
     """Module template
     """
+    cadence = "data"
 
     # def __init__(self, fonts, location, language, units, config):
     #    super().__init__(fonts, location, language, units, config)
@@ -0,0 +1,80 @@
+# pylint: disable=invalid-name, broad-except
+"""Performance HUD (head-up display) overlay
+"""
+
+import os
+import resource
+import threading
+import pygame
+from modules.WeatherModule import Utils
+
+
+def process_rss():
+    """Get resident set size of this process in bytes
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        # peak RSS (kilobytes on Linux) if procfs is not available
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class PerformanceHUD:
+    """Overlay showing frame rate, draw times, fetch time, RSS and threads
+
+    The screen area under the overlay is saved before drawing and restored
+    by erase() before the modules are drawn again, so the overlay never
+    leaves traces on modules that are not redrawn every frame.
+    """
+
+    def __init__(self, fonts, position=(0, 0), size=10):
+        self.font = Utils.font(fonts["name"], size, False)
+        self.position = position
+        self.rect = None
+        self.background = None
+
+    def erase(self, screen):
+        """Restore the screen area under the overlay
+        """
+        if self.background is None:
+            return
+        screen.blit(self.background, self.rect)
+        Utils.add_dirty_rect(self.rect)
+        self.background = None
+
+    def draw(self, screen, frame_scheduler, refresh_scheduler, timer_thread):
+        """Draw the overlay on the screen
+        """
+        fetch_time = timer_thread.get_elapsed_time()
+        lines = [
+            "fps {:.2f}  skipped {}s".format(
+                frame_scheduler.get_frame_rate(),
+                frame_scheduler.skipped_seconds),
+            "fetch {}  rss {:.1f}MB  threads {}".format(
+                "-" if fetch_time is None else "{:.2f}s".format(fetch_time),
+                process_rss() / 1024 / 1024, threading.active_count()),
+            "draw ms  last / p50 / p99"
+        ]
+        for name, last, p50, p99 in refresh_scheduler.get_draw_times():
+            lines.append("{} {:.1f} / {:.1f} / {:.1f}".format(
+                name, last * 1000, p50 * 1000, p99 * 1000))
+
+        images = [
+            self.font.render(line, True, pygame.Color("yellow"))
+            for line in lines
+        ]
+        width = max(image.get_width() for image in images) + 4
+        height = sum(image.get_height() for image in images) + 4
+        self.rect = pygame.Rect(self.position,
+                                (width, height)).clip(screen.get_rect())
+        self.background = screen.subsurface(self.rect).copy()
+
+        overlay = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 192))
+        y = 2
+        for image in images:
+            overlay.blit(image, (2, y))
+            y += image.get_height()
+        screen.blit(overlay, self.rect)
+        Utils.add_dirty_rect(self.rect)
@@ -0,0 +1,132 @@
+# pylint: disable=invalid-name
+"""RefreshScheduler class
+"""
+
+import collections
+import math
+import time
+
+
+def percentile(values, p):
+    """return the p-th percentile of values (nearest rank)
+    """
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class RefreshScheduler:
+    """Call module draw() only when it is due
+
+    Each module declares its refresh cadence with the WeatherModule.cadence
+    attribute:
+        second: every second
+        minute: every minute
+        data: when new data has been published
+        once: only the first time (and after invalidate())
+
+    An invalidated module is drawn on the next draw as if the sections it
+    reads had changed.
+
+    A module that lists the weather data sections it reads in the
+    WeatherModule.sections attribute is updated only when one of those
+    sections has changed.
+    """
+    cadences = ("second", "minute", "data", "once")
+
+    def __init__(self, modules):
+        for module in modules:
+            if module.cadence not in RefreshScheduler.cadences:
+                raise ValueError("{} cadence must be one of {}".format(
+                    module.__class__.__name__,
+                    ", ".join(RefreshScheduler.cadences)))
+        self.modules = modules
+        self.last_keys = {}
+        self.invalidated = set()
+        self.data_versions = {module: 0 for module in modules}
+        self.draw_calls = 0
+        self.skipped_calls = 0
+        self.draw_times = {
+            module: collections.deque(maxlen=100)
+            for module in modules
+        }
+
+    def cadence_key(self, module, now):
+        """return the key that changes whenever the module is due
+        """
+        if module.cadence == "second":
+            return math.floor(now)
+        if module.cadence == "minute":
+            return math.floor(now / 60)
+        if module.cadence == "data":
+            return self.data_versions[module]
+        return 0
+
+    @staticmethod
+    def clock():
+        """return the current time used to decide whether modules are due
+        """
+        return time.time()
+
+    def invalidate(self, module=None):
+        """make a module (all modules by default) due and redraw it fully on
+        the next draw
+        """
+        targets = self.modules if module is None else [module]
+        for target in targets:
+            self.last_keys.pop(target, None)
+            self.invalidated.add(target)
+            target.invalidate()
+
+    @staticmethod
+    def is_updated(module, changed):
+        """return whether the sections read by the module have changed
+        """
+        if module.sections is None:
+            return bool(changed)
+        return not changed.isdisjoint(module.sections)
+
+    def draw(self, screen, weather, changed, data_changed):
+        """draw the modules that are due
+
+        changed is the set of weather data sections changed since the last
+        draw, data_changed is set when any data has been published.
+        """
+        now = self.clock()
+        for module in self.modules:
+            updated = self.is_updated(module, changed)
+            if module in self.invalidated:
+                self.invalidated.discard(module)
+                updated = True
+            if updated or (data_changed and module.sections is None):
+                self.data_versions[module] += 1
+            key = self.cadence_key(module, now)
+            if module in self.last_keys and self.last_keys[module] == key:
+                self.skipped_calls += 1
+                continue
+            self.last_keys[module] = key
+            self.draw_calls += 1
+            start = time.perf_counter()
+            module.draw(screen, weather, updated)
+            self.draw_times[module].append(time.perf_counter() - start)
+
+    def get_stats(self):
+        """get draw call statistics
+        """
+        return {
+            "draw_calls": self.draw_calls,
+            "skipped_calls": self.skipped_calls
+        }
+
+    def get_draw_times(self):
+        """get draw() execution times (last, p50, p99) of each module
+        """
+        draw_times = []
+        for module in self.modules:
+            times = self.draw_times[module]
+            if times:
+                draw_times.append(
+                    (module.__class__.__name__, times[-1],
+                     percentile(times, 50), percentile(times, 99)))
+        return draw_times
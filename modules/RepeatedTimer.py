@@ -1,48 +1,131 @@
-# pylint: disable=invalid-name
+# pylint: disable=invalid-name, too-many-arguments
 """RepeatedTimer class
 """
 
-import hashlib
-import logging
-import threading
+import time
+from modules.Scheduler import scheduler
+from modules.WeatherModule import Utils
 
 
-class RepeatedTimer(threading.Timer):
-    """Thread that executes every N seconds
+def changed_sections(old, new):
+    """Return the top-level keys whose values differ between two results
+
+    Results that are not dicts are a single section named "result".
+    """
+    (old, new) = [
+        value if isinstance(value, dict) else
+        {} if value is None else {"result": value} for value in (old, new)
+    ]
+    return {
+        key
+        for key in old.keys() | new.keys() if old.get(key) != new.get(key)
+    }
+
+
+class RepeatedTimer:
+    """Job that executes every N seconds on the shared scheduler
+
+    The first call is made as soon as the timer is started. The next call is
+    scheduled when the previous one has finished (fixed_delay) or every
+    interval (fixed_rate), so slow calls never overlap.
     """
 
-    def __init__(self, interval, function, args=None, kwargs=None):
-        super().__init__(interval, self.run, args, kwargs)
-        self.thread = None
+    def __init__(self,
+                 interval,
+                 function,
+                 args=None,
+                 kwargs=None,
+                 *,
+                 keep_last=False,
+                 mode="fixed_delay",
+                 jitter=0):
+        self.interval = interval
         self.function = function
+        self.args = args if args is not None else []
+        self.kwargs = kwargs if kwargs is not None else {}
+        self.keep_last = keep_last
+        self.mode = mode
+        self.jitter = jitter
+        self.job = None
         self._return = None
-        self._hash_value = None
-        logging.info("%s thread created. interval: %s", self.function.__name__,
-                     self.interval)
+        self._version = 0
+        self._sections = {}
+        self._elapsed_time = None
+
+    def start(self):
+        """start calling the function on the scheduler
+        """
+        if self.job is None:
+            # a None result is a failed fetch when the last result is kept
+            self.job = scheduler.add_job(self.interval,
+                                         self.run,
+                                         name=self.function.__name__,
+                                         mode=self.mode,
+                                         jitter=self.jitter,
+                                         none_is_failure=self.keep_last)
 
     def run(self):
-        """start thread
+        """call the function once and keep its return value
         """
-        self.thread = threading.Timer(self.interval, self.run)
-        self.thread.start()
-        self._return = self.function(*self.args, **self.kwargs)
-        self._hash_value = hashlib.md5(str(self._return).encode()).hexdigest()
+        start = time.perf_counter()
+        result = self.function(*self.args, **self.kwargs)
+        self._elapsed_time = time.perf_counter() - start
+        if result is None and self.keep_last:
+            # keep the last good result on failure
+            return None
+        changed = changed_sections(self._return, result)
+        self._return = result
+        if changed:
+            self.publish(changed)
+            Utils.data_updated()
+        return result
+
+    def publish(self, changed):
+        """bump the version and record the changed sections
+        """
+        version = self._version + 1
+        sections = dict(self._sections)
+        for section in changed:
+            sections[section] = version
+        self._sections = sections
+        self._version = version
+
+    def set_result(self, result):
+        """set the initial return value (e.g. from a cache)
+        """
+        if result is not None:
+            self._return = result
+            self.publish(changed_sections(None, result))
 
     def get_result(self):
         """get return value
         """
         return self._return
 
-    def get_hash_value(self):
-        """get hash value of return
+    def get_version(self):
+        """get version of return, incremented whenever it changes
+        """
+        return self._version
+
+    def get_changed_sections(self, version=None):
+        """get sections of return changed since a version (None for all)
+        """
+        sections = self._sections
+        if version is None:
+            return set(sections)
+        return {
+            section
+            for section, changed in sections.items() if changed > version
+        }
+
+    def get_elapsed_time(self):
+        """get execution time of the last call
         """
-        return self._hash_value
+        return self._elapsed_time
 
     def quit(self):
-        """stop this therad
+        """stop calling the function
         """
-        if self.thread is not None:
-            logging.info("%s thread stopped", self.function.__name__)
-            self.thread.cancel()
-            self.thread.join()
-            del self.thread
+        if self.job is not None:
+            scheduler.remove_job(self.job)
+            self.job = None
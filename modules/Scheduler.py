@@ -0,0 +1,228 @@
+# pylint: disable=invalid-name, too-many-instance-attributes, broad-except
+"""Scheduler class
+"""
+
+import collections
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from modules.RefreshScheduler import percentile
+
+
+class Job:
+    """Periodic job of the scheduler
+
+    mode:
+        fixed_rate: runs are scheduled every interval from the first run.
+            A run that is due while the previous one is still running is
+            skipped.
+        fixed_delay: the next run is scheduled interval seconds after the
+            previous one finished.
+    """
+    modes = ("fixed_rate", "fixed_delay")
+
+    def __init__(self, interval, function, *, name, mode, jitter, backoff,
+                 max_backoff, none_is_failure):
+        if mode not in Job.modes:
+            raise ValueError("mode must be one of {}".format(", ".join(
+                Job.modes)))
+        self.interval = interval
+        self.function = function
+        self.name = name
+        self.mode = mode
+        self.jitter = jitter
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.none_is_failure = none_is_failure
+        self.next_run = None
+        self.running = False
+        self.cancelled = False
+        self.runs = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.skipped = 0
+        self.latencies = collections.deque(maxlen=100)
+
+    def schedule(self, scheduled, finished):
+        """Calculate the next run time after a run
+        """
+        if self.consecutive_failures:
+            delay = min(self.backoff * 2**(self.consecutive_failures - 1),
+                        self.max_backoff)
+            next_run = finished + delay
+        elif self.mode == "fixed_rate":
+            next_run = scheduled + self.interval
+            if next_run <= finished:
+                # skip the slots missed while running
+                missed = int((finished - next_run) // self.interval) + 1
+                self.skipped += missed
+                next_run += missed * self.interval
+        else:
+            next_run = finished + self.interval
+        if self.jitter:
+            next_run += random.uniform(0, self.jitter)
+        self.next_run = next_run
+
+    def get_stats(self):
+        """Get run count, failures and latency of this job
+        """
+        latencies = list(self.latencies)
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "last": round(latencies[-1], 3) if latencies else None,
+            "p50": round(percentile(latencies, 50), 3),
+            "p99": round(percentile(latencies, 99), 3)
+        }
+
+
+class Scheduler:
+    """
+    Central scheduler for periodic jobs
+
+    One dispatcher thread waits for the next due job and hands it to a
+    bounded worker pool. A job never has more than one run in flight, and
+    failing jobs (exception, or None result if none_is_failure) are retried
+    with exponential backoff.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self.queue = []
+        self.counter = itertools.count()
+        self.jobs = []
+        self.condition = threading.Condition()
+        self.executor = None
+        self.thread = None
+
+    def start(self):
+        """Start the dispatcher thread and the worker pool
+        """
+        with self.condition:
+            if self.thread is not None:
+                return
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="scheduler")
+            self.thread = threading.Thread(target=self.dispatch,
+                                           name="scheduler",
+                                           daemon=True)
+            self.thread.start()
+        logging.info("scheduler started. max workers: %s", self.max_workers)
+
+    def add_job(self,
+                interval,
+                function,
+                *,
+                name=None,
+                mode="fixed_delay",
+                jitter=0,
+                delay=0,
+                backoff=5,
+                max_backoff=None,
+                none_is_failure=False):
+        """Add a periodic job. The first run is after delay seconds.
+
+        Failed runs are retried after backoff seconds, doubled on every
+        failure up to max_backoff (the interval by default).
+        """
+        job = Job(interval,
+                  function,
+                  name=name if name else function.__name__,
+                  mode=mode,
+                  jitter=jitter,
+                  backoff=min(backoff, interval),
+                  max_backoff=max_backoff if max_backoff else interval,
+                  none_is_failure=none_is_failure)
+        job.next_run = time.monotonic() + delay
+        with self.condition:
+            self.jobs.append(job)
+            heapq.heappush(self.queue, (job.next_run, next(self.counter), job))
+            self.condition.notify()
+        logging.info("%s job added. interval: %s mode: %s", job.name,
+                     interval, mode)
+        self.start()
+        return job
+
+    def remove_job(self, job):
+        """Cancel a job. A run in flight is not interrupted.
+        """
+        with self.condition:
+            job.cancelled = True
+            if job in self.jobs:
+                self.jobs.remove(job)
+            self.condition.notify()
+        logging.info("%s job removed", job.name)
+
+    def dispatch(self):
+        """Dispatcher thread: hand due jobs to the worker pool
+        """
+        while True:
+            with self.condition:
+                while not self.queue or \
+                        self.queue[0][0] > time.monotonic():
+                    timeout = self.queue[0][0] - time.monotonic() \
+                        if self.queue else None
+                    self.condition.wait(timeout)
+                scheduled, _count, job = heapq.heappop(self.queue)
+                if job.cancelled:
+                    continue
+                if job.running:
+                    # one run in flight: skip this slot
+                    job.skipped += 1
+                    job.schedule(scheduled, time.monotonic())
+                    heapq.heappush(self.queue,
+                                   (job.next_run, next(self.counter), job))
+                    continue
+                job.running = True
+            self.executor.submit(self.run, job, scheduled)
+
+    def run(self, job, scheduled):
+        """Worker: run a job and schedule the next run
+        """
+        start = time.perf_counter()
+        try:
+            result = job.function()
+            failed = result is None and job.none_is_failure
+        except Exception as e:
+            logging.error(e, exc_info=True)
+            failed = True
+        job.latencies.append(time.perf_counter() - start)
+
+        with self.condition:
+            job.runs += 1
+            if failed:
+                job.failures += 1
+                job.consecutive_failures += 1
+            else:
+                job.consecutive_failures = 0
+            job.running = False
+            if job.cancelled:
+                return
+            job.schedule(scheduled, time.monotonic())
+            if failed:
+                logging.info("%s failed. retry in %.1fs", job.name,
+                             job.next_run - time.monotonic())
+            heapq.heappush(self.queue, (job.next_run, next(self.counter), job))
+            self.condition.notify()
+
+    def get_stats(self):
+        """Get thread count and statistics of each job
+        """
+        with self.condition:
+            jobs = list(self.jobs)
+        stats = {}
+        for job in jobs:
+            name = job.name
+            if name in stats:
+                name = "{}:{}".format(job.name, jobs.index(job))
+            stats[name] = job.get_stats()
+        return {"threads": threading.active_count(), "jobs": stats}
+
+
+# shared scheduler
+scheduler = Scheduler()
@@ -50,6 +50,7 @@ class SelfUpdate(WeatherModule):
       }
     }
     """
+    cadence = "once"
 
     def __init__(self, fonts, location, language, units, config):
         self.check_interval = None
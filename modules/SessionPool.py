@@ -0,0 +1,186 @@
+# pylint: disable=invalid-name
+"""Shared HTTP session pool
+"""
+
+import logging
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class DNSCache:
+    """Small TTL cache in front of socket.getaddrinfo
+
+    Only the connections of the session pool resolve through it (see
+    CachedDNSAdapter), socket.getaddrinfo itself is not replaced.
+    """
+
+    def __init__(self, ttl=300, max_entries=32):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def invalidate(self, host):
+        """Forget the addresses of a host
+        """
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == host]:
+                del self.entries[key]
+
+    def getaddrinfo(self, host, *args, **kwargs):
+        """Cached socket.getaddrinfo
+        """
+        key = (host, ) + args + tuple(sorted(kwargs.items()))
+        now = time.monotonic()
+        with self.lock:
+            if key in self.entries and self.entries[key][0] > now:
+                return self.entries[key][1]
+
+        result = socket.getaddrinfo(host, *args, **kwargs)
+        with self.lock:
+            if len(self.entries) >= self.max_entries:
+                # drop the entry that expires first
+                del self.entries[min(self.entries,
+                                     key=lambda k: self.entries[k][0])]
+            self.entries[key] = (now + self.ttl, result)
+        return result
+
+
+class CachedDNSConnection:
+    """Mixin for urllib3 connections that resolve the host with a DNSCache
+
+    The connection is made to the cached address, while the host name is
+    still used for the Host header and TLS verification.
+    """
+    dns_cache = None
+
+    # _dns_host is the address urllib3 (1.23 to 2.x) connects to
+    # pylint: disable=access-member-before-definition
+    # pylint: disable=attribute-defined-outside-init, no-member
+    def _new_conn(self):
+        host = self._dns_host
+        addresses = self.dns_cache.getaddrinfo(host, self.port, 0,
+                                               socket.SOCK_STREAM)
+        self._dns_host = addresses[0][4][0]
+        try:
+            return super()._new_conn()
+        finally:
+            self._dns_host = host
+
+
+class CachedDNSAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections resolve host names with a DNSCache
+    """
+
+    def __init__(self, dns_cache, **kwargs):
+        self.dns_cache = dns_cache
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        pools = self.poolmanager.pool_classes_by_scheme
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: type(
+                pool.__name__, (pool, ), {
+                    "ConnectionCls":
+                    type(pool.ConnectionCls.__name__,
+                         (CachedDNSConnection, pool.ConnectionCls),
+                         {"dns_cache": self.dns_cache})
+                })
+            for scheme, pool in pools.items()
+        }
+
+
+class SessionPool:
+    """
+    Thread safe pool of keep-alive HTTP sessions, one per host
+
+    Requests to the same host share one connection, so polling does not
+    repeat the DNS lookup, TCP connection and TLS handshake every time.
+
+    example config:
+    {
+      "http": {
+        "timeout": [5, 30],
+        "dns_ttl": 300
+      },
+      ...
+    }
+    """
+
+    def __init__(self, timeout=(5, 30), dns_ttl=300):
+        self.timeout = timeout
+        self.dns_cache = DNSCache(dns_ttl)
+        self.sessions = {}
+        self.requests = {}
+        self.lock = threading.Lock()
+
+    def configure(self, timeout=None, dns_ttl=None):
+        """Change the default timeout (seconds or [connect, read]) and DNS TTL
+        """
+        if timeout is not None:
+            self.timeout = tuple(timeout) if isinstance(timeout,
+                                                        list) else timeout
+        if dns_ttl is not None:
+            self.dns_cache.ttl = dns_ttl
+        logging.info("http session pool timeout: %s dns ttl: %s",
+                     self.timeout, self.dns_cache.ttl)
+
+    def session(self, host):
+        """Get the session and its lock for a host
+        """
+        with self.lock:
+            if host not in self.sessions:
+                session = requests.Session()
+                adapter = CachedDNSAdapter(self.dns_cache,
+                                           pool_connections=1,
+                                           pool_maxsize=1)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self.sessions[host] = (session, threading.Lock())
+                self.requests[host] = 0
+            self.requests[host] += 1
+            return self.sessions[host]
+
+    def get(self, url, **kwargs):
+        """Send a GET request through the session of the url host
+        """
+        host = urlsplit(url).hostname
+        kwargs.setdefault("timeout", self.timeout)
+        session, lock = self.session(host)
+        with lock:
+            try:
+                return session.get(url, **kwargs)
+            except requests.ConnectionError:
+                self.dns_cache.invalidate(host)
+                raise
+
+    def get_stats(self):
+        """Get requests, new connections and reused connections per host
+        """
+        stats = {}
+        with self.lock:
+            sessions = dict(self.sessions)
+            requests_count = dict(self.requests)
+        for host, (session, _lock) in sessions.items():
+            connections = 0
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is not None:
+                        connections += pool.num_connections
+            stats[host] = {
+                "requests": requests_count[host],
+                "connections": connections,
+                "reused": max(0, requests_count[host] - connections)
+            }
+        return stats
+
+
+# shared session pool
+session_pool = SessionPool()
@@ -14,10 +14,14 @@ class TemperatureGraph(WeatherModule):
     Temperature and humidity graph module class
     """
 
+    def __init__(self, fonts, location, language, units, config):
+        super().__init__(fonts, location, language, units, config)
+        self.graph = None
+
     def draw_graph(self, screen, times, temperatures, humidities):
         """draw temperature and humidity graph
         """
-        from modules.GraphUtils import GraphUtils
+        from modules.GraphUtils import GraphUtils, TwoAxisGraph
 
         # smoothing by moving average
         kernel = np.ones(4) / 4
@@ -29,10 +33,16 @@ class TemperatureGraph(WeatherModule):
                                  mode=mode) if humidities else None
 
         self.clear_surface()
-        GraphUtils.set_font(self.fonts["name"])
-        GraphUtils.draw_2axis_graph(screen, self.surface, self.rect, times,
-                                    temperatures, _("Temperature"), humidities,
-                                    _("Humidity"))
+        if self.graph is None:
+            # the figure is kept, only the lines are updated
+            GraphUtils.set_font(self.fonts["name"])
+            self.graph = TwoAxisGraph(
+                self.rect,
+                _("Temperature") if temperatures is not None else None,
+                _("Humidity") if humidities is not None else None)
+        GraphUtils.draw_retained_graph(screen, self.surface, self.rect,
+                                       self.graph, times, temperatures,
+                                       humidities)
 
 
 class TemperatureModule(WeatherModule):
@@ -43,7 +53,7 @@ class TemperatureModule(WeatherModule):
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
         self.sensor_thread = None
-        self.last_hash_value = None
+        self.last_version = None
 
         # histrical data
         self.window_size = 6 * 60
@@ -77,6 +87,9 @@ class TemperatureModule(WeatherModule):
         self.sensor_thread = RepeatedTimer(interval, function, args, kwargs)
         self.sensor_thread.start()
 
+    def draw_background(self):
+        self.draw_text(_("Indoor"), (0, 0), "small", "gray")
+
     def get_sensor_value(self):
         """read last sensor value
         """
@@ -84,7 +97,7 @@ class TemperatureModule(WeatherModule):
         result = self.sensor_thread.get_result()
         if result is None:
             logging.info("%s: No data from sensor", __class__.__name__)
-            self.last_hash_value = None
+            self.last_version = None
             return (None, None, False)
 
         (celsius, humidity) = result
@@ -110,11 +123,11 @@ class TemperatureModule(WeatherModule):
                     f.write("{},{},{}\n".format(dt, celsius, humidity))
 
         # Has the value changed
-        hash_value = self.sensor_thread.get_hash_value()
-        if self.last_hash_value == hash_value:
+        version = self.sensor_thread.get_version()
+        if self.last_version == version:
             return (celsius, humidity, False)
 
-        self.last_hash_value = hash_value
+        self.last_version = version
         return (celsius, humidity, True)
 
     def draw_graph(self, screen, _weather, _updated):
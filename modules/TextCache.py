@@ -0,0 +1,90 @@
+# pylint: disable=invalid-name
+"""Rendered text surface cache
+"""
+
+import collections
+import logging
+from modules.ImageUtils import display_format
+
+
+class TextCache:
+    """
+    LRU cache of rendered text surfaces with a byte budget
+
+    Surfaces are keyed by text, font name, size, bold, color and background,
+    so labels and date lines that are the same every frame are rendered by
+    FreeType only once.
+    """
+
+    def __init__(self, max_bytes=2 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, max_bytes):
+        """Change the byte budget
+        """
+        self.max_bytes = max_bytes
+        self.evict()
+        logging.info("text cache budget: %s bytes", self.max_bytes)
+
+    @staticmethod
+    def surface_bytes(surface):
+        """Return the pixel memory size of a surface
+        """
+        return surface.get_pitch() * surface.get_height()
+
+    def evict(self):
+        """Drop the least recently used surfaces over the budget
+        """
+        while self.entries and self.bytes > self.max_bytes:
+            _key, surface = self.entries.popitem(last=False)
+            self.bytes -= self.surface_bytes(surface)
+            self.evictions += 1
+
+    def render(self, font, key, text, color, background):
+        """Return the rendered text surface, rendering it on a miss
+
+        key identifies the font (e.g. name, size and bold).
+        """
+        key = (text, key, tuple(color),
+               background if isinstance(background, (str, type(None))) else
+               tuple(background))
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = display_format(font.render(text, True, color, background))
+        size = self.surface_bytes(surface)
+        if size <= self.max_bytes:
+            self.entries[key] = surface
+            self.bytes += size
+            self.evict()
+        return surface
+
+    def clear(self):
+        """Drop all surfaces
+        """
+        self.entries.clear()
+        self.bytes = 0
+
+    def get_stats(self):
+        """Get entries, bytes, hits, misses and evictions
+        """
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+# shared text cache
+text_cache = TextCache()
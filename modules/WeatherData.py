@@ -0,0 +1,134 @@
+# pylint: disable=invalid-name, too-few-public-methods
+"""Weather data model
+"""
+
+import datetime
+import numpy as np
+from modules.WeatherModule import Utils
+
+
+def adjust_unit(values, condition, units):
+    """adjust column units for graphs
+    """
+    if condition.startswith("temp") or condition == "dew_point":
+        return values if units == "metric" else Utils.fahrenheit(values)
+    if condition in ("wind_speed", "wind_deg"):
+        return np.round(
+            Utils.kilometer(values) if units == "metric" else values, 1)
+    return values
+
+
+def flatten(record, prefix=""):
+    """yield (name, value) of the numeric fields of a One Call record
+
+    Nested fields are named with "." (e.g. temp.max, rain.1h).
+    """
+    for key, value in record.items():
+        if isinstance(value, dict):
+            yield from flatten(value, "{}{}.".format(prefix, key))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield "{}{}".format(prefix, key), value
+
+
+class Condition:
+    """Weather condition (the first "weather" entry of a record)
+    """
+    __slots__ = ("id", "main", "description", "icon")
+
+    def __init__(self, record):
+        weather = record["weather"][0] if record.get("weather") else {}
+        self.id = weather.get("id")
+        self.main = weather.get("main", "")
+        self.description = weather.get("description", "")
+        self.icon = weather.get("icon")
+
+
+class Current:
+    """Current weather
+    """
+    __slots__ = ("dt", "sunrise", "sunset", "temp", "feels_like", "pressure",
+                 "humidity", "dew_point", "uvi", "clouds", "visibility",
+                 "wind_speed", "wind_deg", "condition")
+
+    def __init__(self, record):
+        for name in Current.__slots__[:-1]:
+            setattr(self, name, record.get(name))
+        self.condition = Condition(record)
+
+
+class Forecast:
+    """
+    Hourly, daily or minutely forecast as NumPy columns
+
+    A column holds one field of all records as float64 and is named like
+    the One Call field, with nested fields joined by "." (e.g. temp.max).
+    Missing values are NaN.
+    """
+
+    def __init__(self, records, units):
+        self.units = units
+        self.dt = np.array([record["dt"] for record in records],
+                           dtype=np.int64)
+        self.conditions = [Condition(record) for record in records]
+        rows = [dict(flatten(record)) for record in records]
+        names = {}
+        for row in rows:
+            names.update(dict.fromkeys(row))
+        self.columns = {
+            name: np.array([row.get(name, np.nan) for row in rows],
+                           dtype=np.float64)
+            for name in names
+        }
+        self.adjusted = {}
+        self.datetimes = None
+
+    def __len__(self):
+        return len(self.dt)
+
+    def __getitem__(self, name):
+        """get a column in the units of the response
+        """
+        if name in self.columns:
+            return self.columns[name]
+        return np.full(len(self), np.nan)
+
+    def column(self, name):
+        """get a column in graph units (see adjust_unit)
+        """
+        if name not in self.adjusted:
+            self.adjusted[name] = adjust_unit(self[name], name, self.units)
+        return self.adjusted[name]
+
+    def times(self):
+        """get the record times as local datetimes
+        """
+        if self.datetimes is None:
+            self.datetimes = [
+                datetime.datetime.fromtimestamp(dt) for dt in self.dt.tolist()
+            ]
+        return self.datetimes
+
+
+class WeatherData:
+    """
+    One Call response parsed once per fetch
+
+    current is a Current record, hourly, daily and minutely are Forecast
+    columns. The raw response sections are still available as weather[key]
+    for external modules.
+    """
+
+    def __init__(self, data, units):
+        self.raw = data
+        self.fetched_at = data.get("fetched_at")
+        self.current = Current(data.get("current", {}))
+        self.hourly = Forecast(data.get("hourly", []), units)
+        self.daily = Forecast(data.get("daily", []), units)
+        self.minutely = Forecast(data.get("minutely", []), units)
+        self.alerts = data.get("alerts", [])
+
+    def __getitem__(self, key):
+        return self.raw[key]
+
+    def __contains__(self, key):
+        return key in self.raw
@@ -2,10 +2,9 @@
 """ Weather forcust graph class
 """
 
-import datetime
 import logging
-from modules.WeatherModule import WeatherModule, Utils
-from modules.GraphUtils import GraphUtils
+from modules.WeatherModule import WeatherModule
+from modules.GraphUtils import GraphUtils, TwoAxisGraph
 
 
 def check_condition(block, condition):
@@ -34,23 +33,6 @@ def check_condition(block, condition):
             raise ValueError("{} must be hourly or daily".format(block))
 
 
-def adjust_unit(values, condition, units):
-    """adjust values units
-    """
-    value = values
-    for key in condition.split("."):
-        value = value[key] if key in value else None
-    if condition == "dt":
-        return datetime.datetime.fromtimestamp(value)
-    if value is not None:
-        value = float(value)
-    if condition.startswith("temp") or condition == "dew_point":
-        return value if units == "metric" else Utils.fahrenheit(value)
-    if condition in ("wind_speed", "wind_deg"):
-        return round(Utils.kilometer(value) if units == "metric" else value, 1)
-    return value
-
-
 def label_name(condition):
     """format label name
     """
@@ -88,6 +70,7 @@ class WeatherForcustGraph(WeatherModule):
 
         https://openweathermap.org/api/one-call-api
     """
+    cadence = "data"
 
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
@@ -95,6 +78,7 @@ class WeatherForcustGraph(WeatherModule):
         self.block = None
         if "block" in config:
             self.block = config["block"]
+        self.sections = (self.block, )
 
         self.conditions = []
         for condition in config["conditions"]:
@@ -103,29 +87,30 @@ class WeatherForcustGraph(WeatherModule):
         if len(self.conditions) < 2:
             self.conditions.append(None)
 
+        self.graph = None
+
         logging.info("weather forcust graph (%s. %s)", self.block,
-                     ",".join(self.conditions))
+                     ",".join(filter(None, self.conditions)))
 
     def draw(self, screen, weather, updated):
         if weather is None or not updated:
             return
 
-        data = weather[self.block]
-        times = list(map(lambda x: adjust_unit(x, "dt", self.units), data))
-        y1 = ylabel1 = None
-        if self.conditions[0]:
-            y1 = list(
-                map(lambda x: adjust_unit(x, self.conditions[0], self.units),
-                    data))
-            ylabel1 = label_name(self.conditions[0])
-        y2 = ylabel2 = None
-        if self.conditions[1]:
-            y2 = list(
-                map(lambda x: adjust_unit(x, self.conditions[1], self.units),
-                    data))
-            ylabel2 = label_name(self.conditions[1])
+        data = getattr(weather, self.block)
+        times = data.times()
+        (y1, y2) = [
+            data.column(condition) if condition else None
+            for condition in self.conditions
+        ]
 
         self.clear_surface()
-        GraphUtils.set_font(self.fonts["name"])
-        GraphUtils.draw_2axis_graph(screen, self.surface, self.rect, times, y1,
-                                    _(ylabel1), y2, _(ylabel2))
+        if self.graph is None:
+            # the figure is kept, only the lines are updated
+            GraphUtils.set_font(self.fonts["name"])
+            (ylabel1, ylabel2) = [
+                _(label_name(condition)) if condition else None
+                for condition in self.conditions
+            ]
+            self.graph = TwoAxisGraph(self.rect, ylabel1, ylabel2)
+        GraphUtils.draw_retained_graph(screen, self.surface, self.rect,
+                                       self.graph, times, y1, y2)
@@ -2,16 +2,24 @@
 """Utility class and WeatherModule class
 """
 
+import bisect
 import datetime
-import io
+import itertools
 import logging
-import math
-import os
-import sys
+import threading
+import time
+import unicodedata
 from functools import lru_cache
-import requests
+import numpy as np
 import pygame
 from PIL import Image, ImageDraw
+from modules.FontCache import font_cache
+from modules.IconCache import icon_cache
+from modules.ImageUtils import display_format, pil_to_surface
+from modules.TextCache import text_cache
+
+# resolution of the wind arrow bearings in degrees
+WIND_ARROW_STEP = 5
 
 
 class Utils:
@@ -55,6 +63,13 @@ class Utils:
         }
     ]
 
+    # character widths of each font (see glyph_advances)
+    glyph_widths = {}
+
+    # screen areas updated since the last display update
+    dirty_rects = []
+    dirty_lock = threading.Lock()
+
     @staticmethod
     def strftime(timestamp, fmt):
         """Format unix timestamp to text.
@@ -85,6 +100,16 @@ class Utils:
         """
         return ("{}°c" if units == "metric" else "{}°f").format(value)
 
+    @staticmethod
+    def data_age(data):
+        """Return seconds since the data was fetched
+        """
+        fetched_at = data.get("fetched_at") if isinstance(
+            data, dict) else getattr(data, "fetched_at", None)
+        if fetched_at is None:
+            return None
+        return time.time() - fetched_at
+
     @staticmethod
     def color(name):
         """Convert Color name to RGBA value
@@ -179,113 +204,186 @@ class Utils:
     def font(name, size, bold):
         """Create a new Font object
         """
+        (path, set_bold) = font_cache.resolve(name, bold)
+        font = pygame.font.Font(path, size)
+        if set_bold:
+            font.set_bold(True)
         logging.debug("font %s %spxl loaded", name, size)
-        return pygame.font.SysFont(name, size, bold)
+        return font
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def fit_layout(name, sizes, layouts, bold, width, height):
+        """Return the first size and layout whose lines fit in width, height
+
+        sizes are (size name, pixels) from the largest, layouts are tuples
+        of lines. The smallest size and the last layout are returned if
+        nothing fits.
+        """
+        for size, pixels in sizes:
+            font = Utils.font(name, pixels, bold)
+            for lines in layouts:
+                extents = [font.size(line) for line in lines if line]
+                if max([w for w, _h in extents], default=0) <= width and \
+                        sum(h for _w, h in extents) <= height:
+                    return size, lines
+        return sizes[-1][0], layouts[-1]
 
     @staticmethod
     @lru_cache()
-    def weather_icon(name, size):
-        """Create a weather image
+    def freetype_font(name, size, bold):
+        """Create a new pygame.freetype Font object (fonts.backend freetype)
+        """
+        from pygame import freetype  # pylint: disable=import-outside-toplevel
+        if not freetype.get_init():
+            freetype.init()
+        (path, set_bold) = font_cache.resolve(name, bold)
+        font = freetype.Font(path, size)
+        font.strong = set_bold
+        # full line height boxes, the same layout as pygame.font
+        font.pad = True
+        logging.debug("freetype font %s %spxl loaded", name, size)
+        return font
+
+    @staticmethod
+    @lru_cache()
+    def glyph_atlas(name, size, bold, color):
+        """Render digits, separators and space once for a font and color
+
+        Returns the glyphs and the width of a digit cell (the widest digit).
         """
-        try:
-            file = "{}/icons/{}.png".format(sys.path[0], name)
-            if os.path.isfile(file):
-                # get icons from local folder
-                image = Image.open(file)
-            else:
-                # get icons from OpenWeather
-                response = requests.get(
-                    "http://openweathermap.org/img/wn/{}@2x.png".format(name))
-                response.raise_for_status()
-                image = Image.open(io.BytesIO(response.content))
-
-            # resize icon
-            (width, height) = image.size
-            if width >= height:
-                (width, height) = (size, int(size / width * height))
-            else:
-                (width, height) = (int(size / width * height), size)
-            image = image.resize((width, height), Image.LANCZOS)
+        font = Utils.font(name, size, bold)
+        color = Utils.color(color)
+        glyphs = {
+            char: display_format(
+                font.render(char, True, color, pygame.Color("black")))
+            for char in "0123456789:. "
+        }
+        width = max(glyphs[char].get_width() for char in "0123456789")
+        return glyphs, width
+
+    @staticmethod
+    def glyph_advances(font, text):
+        """Return the widths of the characters of text
 
-            # convert pygame image
-            image = pygame.image.fromstring(image.tobytes(), image.size,
-                                            image.mode)
+        The widths are measured once per font and character and kept in a
+        table built lazily.
+        """
+        widths = Utils.glyph_widths.setdefault(font, {})
+        for char in set(text).difference(widths):
+            widths[char] = font.size(char)[0]
+        return [widths[char] for char in text]
 
-            logging.debug("weather icon %s %s loaded", name, size)
-            return image
+    @staticmethod
+    def line_break(text, start, end):
+        """Return where to break a line that does not fit before text[end]
 
-        except Exception as e:
-            logging.error(e, exc_info=True)
-            return None
+        Latin words are kept together by breaking at the last space. CJK
+        text can be broken at any character.
+        """
+        if " " in (text[end - 1], text[end]) or any(
+                unicodedata.east_asian_width(char) in ("W", "F")
+                for char in (text[end - 1], text[end])):
+            return end
+        space = text.rfind(" ", start + 1, end)
+        return space if space > start else end
+
+    @staticmethod
+    def weather_icon(name, size):
+        """Get a weather image (a placeholder while it is being loaded)
+        """
+        image = icon_cache.get(name, size)
+        return image if image is not None else Utils.placeholder_icon(size)
 
     @staticmethod
     @lru_cache()
-    def moon_icon(age, size):
-        """Create a moon phase image
+    def placeholder_icon(size):
+        """Create a placeholder image for an icon that is being loaded
         """
-        _size = 200  # Create a large image and resize it
-        radius = int(_size / 2)
+        image = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.draw.circle(image, pygame.Color("gray25"),
+                           (size // 2, size // 2), size // 3, 2)
+        return display_format(image)
 
-        image = Image.new("RGBA", (_size + 2, _size + 2))
-        draw = ImageDraw.Draw(image)
+    @staticmethod
+    def moon_coverage(ages, size, samples=4):
+        """Compute the disk and shadow coverage of moon phase images
 
-        # draw full moon
-        draw.ellipse([(1, 1), (_size, _size)], fill="white")
-
-        # draw shadow
-        theta = age / 14.765 * math.pi
-        sum_x = sum_length = 0
-        for y in range(-radius, radius, 1):
-            alpha = math.acos(y / radius)
-            x = radius * math.sin(alpha)
-            length = radius * math.cos(theta) * math.sin(alpha)
-            if age < 15:
-                start = (radius - x + 1, radius + y + 1)
-                end = (radius + length + 1, radius + y + 1)
-            else:
-                start = (radius - length + 1, radius + y + 1)
-                end = (radius + x + 1, radius + y + 1)
-            draw.line((start, end), fill="dimgray")
-            sum_x += 2 * x
-            sum_length += end[0] - start[0]
+        Each pixel is sampled samples x samples times (anti-aliasing). The
+        shadow boundary of a row is at x = cos(age / 14.765 * pi) of the
+        half chord, on the left side before full moon and on the right
+        side after it. Returns two arrays of shape (ages, size, size).
+        """
+        n = size * samples
+        # same margin as the 202px image the disk was drawn in before
+        axis = ((np.arange(n) + 0.5) / n * 202 - 101) / 100
+        (x, y) = np.meshgrid(axis, axis, sparse=True)
+        chord = np.sqrt(np.maximum(1 - y * y, 0))
+        disk = x * x + y * y <= 1
 
-        # resize
-        image = image.resize((size, size), Image.LANCZOS)
+        ages = np.asarray(ages).reshape(-1, 1, 1)
+        boundary = chord * np.cos(ages / 14.765 * np.pi)
+        shadow = np.where(ages < 15, x < boundary, x > -boundary) & disk
 
-        # convert pygame image
-        image = pygame.image.fromstring(image.tobytes(), image.size,
-                                        image.mode)
+        def downsample(mask):
+            return mask.reshape(-1, size, samples, size,
+                                samples).mean(axis=(2, 4))
 
-        logging.info("moon phase age: %s parcentage: %s", age,
-                     round(100 - (sum_length / sum_x) * 100, 1))
-        return image
+        return downsample(np.broadcast_to(disk, shadow.shape)), downsample(
+            shadow)
 
     @staticmethod
     @lru_cache()
-    def wind_arrow_icon(wind_deg, size):
-        """Create a wind direction allow image
+    def moon_atlas(size):
+        """Create the moon phase images of ages 0 to 29 side by side
+
+        Returns the atlas and the illuminated percentage of each age.
+        """
+        (disk, shadow) = Utils.moon_coverage(range(30), size)
+        lit = np.divide(disk - shadow,
+                        disk,
+                        out=np.zeros_like(disk),
+                        where=disk > 0)
+
+        # white lit part, dimgray shadow, transparent outside of the disk
+        atlas = pygame.Surface((size * 30, size), pygame.SRCALPHA)
+        gray = np.round(105 + 150 * lit).astype(np.uint8)
+        alpha = np.round(255 * disk).astype(np.uint8)
+        pixels = pygame.surfarray.pixels3d(atlas)
+        pixels[...] = np.concatenate(gray, axis=1).T[:, :, np.newaxis]
+        del pixels
+        pixels = pygame.surfarray.pixels_alpha(atlas)
+        pixels[...] = np.concatenate(alpha, axis=1).T
+        del pixels
+
+        percentages = np.round(
+            100 * (disk - shadow).sum(axis=(1, 2)) / disk.sum(axis=(1, 2)),
+            1).tolist()
+        logging.debug("moon atlas %spxl created", size)
+        return display_format(atlas), percentages
+
+    @staticmethod
+    def moon_icon(age, size):
+        """Get a moon phase image (a view of the atlas)
+        """
+        (atlas, _percentages) = Utils.moon_atlas(size)
+        return atlas.subsurface((age * size, 0, size, size))
+
+    @staticmethod
+    @lru_cache()
+    def wind_arrow_sprite(size):
+        """Create the wind direction allow image of north wind (0 degree)
         """
         _size = 200  # Create a large image and resize it
         width = 0.15 * _size  # arrowhead width
         height = 0.25 * _size  # arrowhead height
 
+        # from the top (north) to the bottom
         radius = _size / 2
-        angle = 90 - wind_deg
-        theta = angle / 360 * math.pi * 2
-
-        tail = (radius + radius * math.cos(theta),
-                radius - radius * math.sin(theta))
-        head = (radius + radius * math.cos(theta + math.pi),
-                radius - radius * math.sin(theta + math.pi))
-
-        base_vector = (head[0] - tail[0], head[1] - tail[1])
-        length = math.sqrt(base_vector[0]**2 + base_vector[1]**2)
-        unit_vector = (base_vector[0] / length, base_vector[1] / length)
-
-        left = (head[0] - unit_vector[1] * width - unit_vector[0] * height,
-                head[1] + unit_vector[0] * width - unit_vector[1] * height)
-        right = (head[0] + unit_vector[1] * width - unit_vector[0] * height,
-                 head[1] - unit_vector[0] * width - unit_vector[1] * height)
+        tail = (radius, 0)
+        head = (radius, _size)
+        left = (radius - width, _size - height)
+        right = (radius + width, _size - height)
 
         image = Image.new("RGBA", (_size, _size))
         draw = ImageDraw.Draw(image)
@@ -295,13 +393,54 @@ class Utils:
         # resize
         image = image.resize((size, size), Image.LANCZOS)
 
-        # convert pygame image
-        image = pygame.image.fromstring(image.tobytes(), image.size,
-                                        image.mode)
+        image = pil_to_surface(image)
 
-        logging.info("wind degree: %s", wind_deg)
+        logging.debug("wind arrow %spxl created", size)
         return image
 
+    @staticmethod
+    @lru_cache(maxsize=2 * 360 // WIND_ARROW_STEP)
+    def rotated_wind_arrow(bearing, size):
+        """Rotate the wind arrow sprite clockwise by a quantized bearing
+
+        The sprite is rotated at 4x and scaled down, which keeps the arrow
+        centered within a quarter pixel at every bearing.
+        """
+        _size = size * 4
+        image = pygame.transform.rotozoom(Utils.wind_arrow_sprite(_size),
+                                          -bearing, 1)
+        canvas = pygame.Surface((_size, _size), pygame.SRCALPHA)
+        canvas.blit(image, ((_size - image.get_width()) // 2,
+                            (_size - image.get_height()) // 2))
+        return display_format(
+            pygame.transform.smoothscale(canvas, (size, size)))
+
+    @staticmethod
+    def wind_arrow_icon(wind_deg, size):
+        """Get a wind direction allow image
+
+        The bearing is rounded to WIND_ARROW_STEP degrees, so at most
+        360 / WIND_ARROW_STEP images are kept per size.
+        """
+        bearing = round(wind_deg / WIND_ARROW_STEP) * WIND_ARROW_STEP % 360
+        return Utils.rotated_wind_arrow(bearing, size)
+
+    @staticmethod
+    def add_dirty_rect(rect):
+        """Record a screen area that needs to be sent to the display
+        """
+        with Utils.dirty_lock:
+            Utils.dirty_rects.append(pygame.Rect(rect))
+
+    @staticmethod
+    def pop_dirty_rects():
+        """Return and clear the screen areas updated since the last call
+        """
+        with Utils.dirty_lock:
+            rects = Utils.dirty_rects
+            Utils.dirty_rects = []
+        return rects
+
     @staticmethod
     def display_sleep():
         """Send display sleep event
@@ -330,11 +469,34 @@ class Utils:
         RESTART = pygame.USEREVENT + 4
         pygame.event.post(pygame.event.Event(RESTART))
 
+    @staticmethod
+    def icon_loaded(name, size):
+        """Send icon loaded event to redraw the icon placeholders
+        """
+        ICON_LOADED = pygame.USEREVENT + 6
+        if pygame.display.get_init():
+            pygame.event.post(
+                pygame.event.Event(ICON_LOADED, name=name, size=size))
+
+    @staticmethod
+    def data_updated():
+        """Send data updated event to wake up the main loop
+        """
+        DATA_UPDATED = pygame.USEREVENT + 5
+        if pygame.display.get_init():
+            pygame.event.post(pygame.event.Event(DATA_UPDATED))
+
 
 class WeatherModule:
     """Weather Module
     """
 
+    # draw() refresh cadence. ["second", "minute", "data", "once"]
+    cadence = "second"
+
+    # weather data sections read by draw(). None for any section
+    sections = None
+
     def __init__(self, fonts, location, language, units, config):
         """Initialize
         """
@@ -343,8 +505,13 @@ class WeatherModule:
         self.language = language
         self.units = units
         self.config = config
+        self.layout_scale = config[
+            "layout_scale"] if "layout_scale" in config else 1
         self.rect = pygame.Rect(config["rect"])
-        self.surface = pygame.Surface((self.rect.width, self.rect.height))
+        self.surface = display_format(
+            pygame.Surface((self.rect.width, self.rect.height)))
+        self.background = None
+        self.placeholders = set()
 
     def quit(self):
         """Destractor
@@ -354,15 +521,73 @@ class WeatherModule:
         """Draw surface
         """
 
+    def invalidate(self):
+        """Forget what has been drawn so that the next draw() is complete
+        """
+        self.background = None
+
+    def draw_background(self):
+        """Draw static content (labels, icons) on the cleared surface
+
+        It is drawn once into the background layer that clear_surface()
+        restores, so draw() only renders the values.
+        """
+
+    def icon_sizes(self):
+        """Weather icon sizes drawn by this module (to prewarm the cache)
+        """
+        return []
+
+    def weather_icon(self, name, size):
+        """Get a weather image (a placeholder while it is being loaded)
+
+        The placeholders drawn are remembered until the icon is loaded.
+        """
+        image = icon_cache.get(name, size)
+        if image is None:
+            self.placeholders.add((name, size))
+            return Utils.placeholder_icon(size)
+        return image
+
+    def icon_loaded(self, name, size):
+        """Return whether the placeholder of a loaded icon has been drawn
+        """
+        # modules that do not call WeatherModule.__init__ draw no icons
+        placeholders = getattr(self, "placeholders", ())
+        if (name, size) not in placeholders:
+            return False
+        self.placeholders.discard((name, size))
+        return True
+
+    def scaled(self, value):
+        """Scale a layout value (offset, icon size) to the display
+        """
+        return int(value * self.layout_scale)
+
     def clear_surface(self):
-        """Clear Surface
+        """Clear Surface (to the background layer)
         """
+        if self.background is not None:
+            self.surface.blit(self.background, (0, 0))
+            return
         self.surface.fill(pygame.Color("black"))
+        if type(self).draw_background is not WeatherModule.draw_background:
+            self.draw_background()
+            self.background = self.surface.copy()
 
-    def update_screen(self, screen):
-        """Draw surface on screen
+    def update_screen(self, screen, rects=None):
+        """Draw surface on screen and mark the area as updated
+
+        Only the given areas of the surface are drawn if rects is set.
         """
-        screen.blit(self.surface, (self.rect.left, self.rect.top))
+        if rects is None:
+            screen.blit(self.surface, (self.rect.left, self.rect.top))
+            Utils.add_dirty_rect(self.rect)
+            return
+        for rect in rects:
+            area = pygame.Rect(rect).clip(self.surface.get_rect())
+            screen.blit(self.surface, area.move(self.rect.topleft), area)
+            Utils.add_dirty_rect(area.move(self.rect.topleft))
 
     def text_size(self, text, size, *, bold=False):
         """Determine the amount of space needed to render text
@@ -371,23 +596,52 @@ class WeatherModule:
             return (0, 0)
         return self.font(size, bold).size(text)
 
+    def fit_text(self, text, *, bold=False, top=0):
+        """Return the largest size in which text fits below top
+        """
+        return self.fit_lines(text, [], bold=bold, top=top)[0]
+
+    def fit_lines(self, horizontal, vertical, *, bold=False, top=0):
+        """Return the largest size and the lines that fit below top
+
+        In each size from "large" to "small", the horizontal text on one
+        line is tried first, then the vertical lines (one per item). The
+        result is cached per text, area and font.
+        """
+        sizes = tuple(
+            (size, self.fonts["size"][size])
+            for size in ("large", "medium", "small"))
+        layouts = ((horizontal, ), tuple(vertical)) if vertical else (
+            (horizontal, ), )
+        return Utils.fit_layout(self.fonts["name"], sizes, layouts, bold,
+                                self.rect.width, self.rect.height - top)
+
     def text_warp(self, text, line_width, size, *, bold=False, max_lines=0):
         """Text wrapping
+
+        Lines are broken at spaces when the text around the break point is
+        not CJK (word wrap), otherwise at any character. The last line of
+        truncated text is filled up to the width before ".." is put.
         """
         font = self.font(size, bold)
+        offsets = list(
+            itertools.accumulate(Utils.glyph_advances(font, text), initial=0))
         lines = []
-        cur_line = ""
-        cur_width = 0
-        for char in text:
-            (width, _height) = font.size(char)
-            if cur_width + width > line_width:
-                lines.append(cur_line)
-                cur_line = ""
-                cur_width = 0
-            cur_line += char
-            cur_width += width
-        if cur_line:
-            lines.append(cur_line)
+        start = 0
+        while start < len(text) and not 0 < max_lines < len(lines):
+            # the longest line that fits (at least one character)
+            end = bisect.bisect_right(offsets, offsets[start] + line_width) - 1
+            end = max(end, start + 1)
+            if len(lines) == max_lines - 1:
+                # the last line (truncated if the text continues)
+                lines.append(text[start:end])
+            else:
+                if end < len(text):
+                    end = Utils.line_break(text, start, end)
+                lines.append(text[start:end].rstrip(" "))
+            start = end
+            while start < len(text) and text[start] == " ":
+                start += 1
         if 0 < max_lines < len(lines):
             # Put a placeholder if the text is truncated
             lines = lines[:max_lines]
@@ -435,14 +689,30 @@ class WeatherModule:
             return position
 
         (x, y) = position
-        font = self.font(size, bold)
-        (width, height) = font.size(text)
+        if isinstance(size, str):
+            size = self.fonts["size"][size]
         color = Utils.color(color) if isinstance(color, str) else color
+        if self.fonts.get("backend") == "freetype":
+            # rasterize straight into the module surface
+            font = Utils.freetype_font(self.fonts["name"], size, bold)
+            width = font.get_rect(text).width
+            if align == "center":
+                x = (self.rect.width - width) / 2
+            elif align == "right":
+                x = self.rect.width - width
+            rect = font.render_to(self.surface, (x, y), text, color,
+                                  background)
+            return x + rect.width, rect.height
+
+        font = self.font(size, bold)
+        image = text_cache.render(font, (self.fonts["name"], size, bold),
+                                  text, color, background)
+        (width, height) = image.get_size()
         if align == "center":
             x = (self.rect.width - width) / 2
         elif align == "right":
             x = self.rect.width - width
-        self.surface.blit(font.render(text, True, color, background), (x, y))
+        self.surface.blit(image, (x, y))
         (right, bottom) = (x + width, height)
         return right, bottom
 
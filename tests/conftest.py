@@ -0,0 +1,10 @@
+# pylint: disable=invalid-name
+"""pytest configuration: run pygame headless and import modules from the root
+"""
+
+import os
+import sys
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,35 @@
+"""DataCache tests
+"""
+
+import json
+from modules.DataCache import DataCache
+
+KEY = [35.68, 139.76, "Tokyo", "en", "metric"]
+
+
+def test_save_and_load(tmp_path):
+    file = str(tmp_path / "cache" / "onecall.json")
+    data = {"current": {"dt": 1600000000, "temp": 20.5}}
+    DataCache(file, KEY).save(data, 1600000100)
+    assert DataCache(file, list(KEY)).load() == data
+    with open(file, "r") as f:
+        assert json.loads(f.read())["fetched_at"] == 1600000100
+    assert [path.name for path in tmp_path.joinpath("cache").iterdir()
+            ] == ["onecall.json"]
+
+
+def test_key_mismatch(tmp_path):
+    file = str(tmp_path / "onecall.json")
+    DataCache(file, KEY).save({"current": {}})
+    assert DataCache(file, KEY[:3] + ["ja", "metric"]).load() is None
+    assert DataCache(file, KEY[:3] + ["en", "imperial"]).load() is None
+    # the file is kept for the configured key
+    assert DataCache(file, KEY).load() == {"current": {}}
+
+
+def test_missing_or_broken_file(tmp_path):
+    file = str(tmp_path / "onecall.json")
+    assert DataCache(file, KEY).load() is None
+    with open(file, "w") as f:
+        f.write("{")
+    assert DataCache(file, KEY).load() is None
@@ -0,0 +1,81 @@
+# pylint: disable=invalid-name
+"""FrameScheduler tests
+"""
+
+import math
+import time
+import pygame
+import pytest
+from modules.FrameScheduler import FrameScheduler
+
+
+@pytest.fixture(name="clock")
+def fixture_clock(monkeypatch):
+    """wall clock that runs in real time and can be set back"""
+
+    class Clock:
+        offset = 0.0
+
+        def time(self):
+            return real_time() + self.offset
+
+    real_time = time.time
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock.time)
+    pygame.display.init()
+    pygame.event.clear()
+    yield clock
+    pygame.display.quit()
+
+
+def wait_tick(scheduler, limit=3):
+    """wait until a tick, return the real seconds it took"""
+    start = time.monotonic()
+    while time.monotonic() - start < limit:
+        (tick, _events) = scheduler.wait()
+        if tick:
+            break
+    return time.monotonic() - start
+
+
+def test_ticks_every_second(clock):
+    scheduler = FrameScheduler()
+    wait_tick(scheduler)
+    assert wait_tick(scheduler) < 1.2
+    assert scheduler.next_tick == math.floor(clock.time()) + 1
+
+
+def test_clock_set_back(clock):
+    scheduler = FrameScheduler()
+    wait_tick(scheduler)
+
+    # NTP or fake-hwclock steps the clock back an hour
+    clock.offset = -3600
+    assert wait_tick(scheduler) < 1.2
+    assert scheduler.next_tick == math.floor(clock.time()) + 1
+    assert wait_tick(scheduler) < 1.2
+
+
+def test_event_after_clock_set_back(clock):
+    scheduler = FrameScheduler()
+    wait_tick(scheduler)
+
+    clock.offset = -3600
+    pygame.event.post(pygame.event.Event(pygame.USEREVENT))
+    (_tick, events) = scheduler.wait()
+    assert [event.type for event in events] == [pygame.USEREVENT]
+    assert wait_tick(scheduler) < 1.2
+
+
+def test_polling_without_event_wait_timeout(clock, monkeypatch):
+    # pygame < 2.0.1 has no pygame.event.wait(timeout)
+    monkeypatch.setattr("modules.FrameScheduler.EVENT_WAIT_TIMEOUT", False)
+    scheduler = FrameScheduler()
+    wait_tick(scheduler)
+    assert wait_tick(scheduler) < 1.2
+
+    clock.offset = -3600
+    pygame.event.post(pygame.event.Event(pygame.USEREVENT))
+    (_tick, events) = scheduler.wait()
+    assert [event.type for event in events] == [pygame.USEREVENT]
+    assert wait_tick(scheduler) < 1.2
@@ -0,0 +1,69 @@
+"""Framebuffer tests
+"""
+
+import numpy as np
+import pygame
+import pytest
+from modules.Framebuffer import Framebuffer
+
+
+@pytest.fixture(name="device")
+def fixture_device(tmp_path):
+    """regular file standing in for /dev/fbN
+    """
+    return str(tmp_path / "fb")
+
+
+def read(device):
+    """read the RGB565 pixels of the 32x16 framebuffer file
+    """
+    return np.fromfile(device, dtype=np.uint16).reshape(16, 32)
+
+
+def test_regular_file_is_created(device):
+    surface = pygame.Surface((32, 16), depth=32)
+    surface.fill(pygame.Color("red"))
+    framebuffer = Framebuffer(device, surface.get_size())
+    try:
+        assert framebuffer.update(surface) == 2
+    finally:
+        framebuffer.close()
+
+    pixels = read(device)
+    assert (pixels == 0xf800).all()
+
+
+def test_only_changed_tiles_are_written(device):
+    surface = pygame.Surface((32, 16), depth=32)
+    surface.fill(pygame.Color("red"))
+    framebuffer = Framebuffer(device, surface.get_size())
+    try:
+        framebuffer.update(surface)
+        assert framebuffer.update(surface) == 0
+
+        # a change in the second tile, updated through a partial rect
+        surface.fill(pygame.Color("blue"), pygame.Rect(20, 4, 4, 4))
+        assert framebuffer.update(surface, [pygame.Rect(20, 4, 4, 4)]) == 1
+        assert framebuffer.update(surface) == 0
+        assert framebuffer.written_tiles == 3
+    finally:
+        framebuffer.close()
+
+    pixels = read(device)
+    assert (pixels[4:8, 20:24] == 0x001f).all()
+    pixels[4:8, 20:24] = 0xf800
+    assert (pixels == 0xf800).all()
+
+
+@pytest.mark.parametrize("depth", [16, 24])
+def test_other_surface_depths(device, depth):
+    surface = pygame.Surface((32, 16), depth=depth)
+    surface.fill(pygame.Color("green"))
+    framebuffer = Framebuffer(device, surface.get_size())
+    try:
+        assert framebuffer.update(surface, [pygame.Rect(0, 0, 16, 16)]) == 1
+        assert framebuffer.update(surface) == 1
+    finally:
+        framebuffer.close()
+
+    assert (read(device) == 0x07e0).all()
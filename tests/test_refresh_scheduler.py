@@ -0,0 +1,96 @@
+"""RefreshScheduler tests
+"""
+
+import pygame
+import pytest
+from modules.IconCache import icon_cache
+from modules.RefreshScheduler import RefreshScheduler
+from modules.WeatherModule import WeatherModule
+from WeatherPi import redraw_icon_placeholders
+
+
+class IconModule(WeatherModule):
+    """module drawing an icon when its data has changed
+    """
+    cadence = "data"
+    sections = ("current", )
+
+    def __init__(self, icon):
+        super().__init__({}, {}, "en", "metric", {"rect": [0, 0, 50, 50]})
+        self.icon = icon
+        self.draws = []
+
+    def draw(self, screen, weather, updated):
+        if not updated:
+            return
+        self.draws.append(self.weather_icon(self.icon, 50))
+
+
+class SensorModule(WeatherModule):
+    """module that does not call WeatherModule.__init__ (as PIR)
+    """
+    cadence = "once"
+
+    def __init__(self):  # pylint: disable=super-init-not-called
+        self.draws = 0
+
+    def invalidate(self):
+        pass
+
+    def draw(self, screen, weather, updated):
+        self.draws += 1
+
+
+@pytest.fixture(name="icons")
+def fixture_icons(monkeypatch):
+    """icon cache with only 01d loaded
+    """
+    monkeypatch.setattr(icon_cache, "images",
+                        {("01d", 50): pygame.Surface((50, 50))})
+    monkeypatch.setattr(icon_cache, "load_async", lambda name, sizes: None)
+    return icon_cache
+
+
+def test_icon_loaded_redraws_only_placeholder_modules(icons):
+    loaded = IconModule("01d")
+    loading = IconModule("10n")
+    scheduler = RefreshScheduler([loaded, loading])
+    scheduler.draw(None, {}, {"current"}, True)
+    assert (len(loaded.draws), len(loading.draws)) == (1, 1)
+    assert loading.placeholders == {("10n", 50)}
+    assert not loaded.placeholders
+
+    # ICON_LOADED handler of WeatherPi.main
+    icons.images[("10n", 50)] = pygame.Surface((50, 50))
+    assert redraw_icon_placeholders(scheduler.modules, scheduler, "10n", 50)
+    scheduler.draw(None, {}, set(), False)
+    assert (len(loaded.draws), len(loading.draws)) == (1, 2)
+    assert not loading.placeholders
+
+    # the placeholder is replaced once
+    assert not loading.icon_loaded("10n", 50)
+    scheduler.draw(None, {}, set(), False)
+    assert (len(loaded.draws), len(loading.draws)) == (1, 2)
+
+
+@pytest.mark.usefixtures("icons")
+def test_icon_loaded_skips_modules_without_base_init():
+    loading = IconModule("10n")
+    sensor = SensorModule()
+    scheduler = RefreshScheduler([sensor, loading])
+    scheduler.draw(None, {}, {"current"}, True)
+    assert not redraw_icon_placeholders(scheduler.modules, scheduler, "01d",
+                                        50)
+    assert redraw_icon_placeholders(scheduler.modules, scheduler, "10n", 50)
+    scheduler.draw(None, {}, set(), False)
+    assert (sensor.draws, len(loading.draws)) == (1, 2)
+
+
+@pytest.mark.usefixtures("icons")
+def test_invalidate_all_modules():
+    modules = [IconModule("01d"), IconModule("01d")]
+    scheduler = RefreshScheduler(modules)
+    scheduler.draw(None, {}, {"current"}, True)
+    scheduler.invalidate()
+    scheduler.draw(None, {}, set(), False)
+    assert [len(module.draws) for module in modules] == [2, 2]
@@ -0,0 +1,92 @@
+"""RepeatedTimer change detection tests
+"""
+
+import copy
+import json
+import os
+from modules.RepeatedTimer import RepeatedTimer, changed_sections
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                       "benchmarks", "fixtures", "onecall.json")
+
+
+def onecall():
+    """recorded One Call response
+    """
+    with open(FIXTURE, "r") as f:
+        return json.loads(f.read())
+
+
+def test_changed_sections():
+    old = onecall()
+    new = copy.deepcopy(old)
+    new["current"]["dt"] += 600
+    assert changed_sections(old, new) == {"current"}
+    assert changed_sections(old, copy.deepcopy(old)) == set()
+
+
+def test_missing_alerts():
+    alerts = onecall()
+    no_alerts = copy.deepcopy(alerts)
+    del no_alerts["alerts"]
+    assert changed_sections(alerts, no_alerts) == {"alerts"}
+    assert changed_sections(no_alerts, alerts) == {"alerts"}
+    assert changed_sections(None, no_alerts) == set(no_alerts)
+
+
+def test_non_dict_results():
+    assert changed_sections(None, 21.5) == {"result"}
+    assert changed_sections(21.5, 21.5) == set()
+    assert changed_sections(21.5, 22.0) == {"result"}
+    assert changed_sections((21.5, 40), None) == {"result"}
+    assert changed_sections(None, None) == set()
+
+
+def test_get_changed_sections():
+    results = [onecall()]
+    timer = RepeatedTimer(600, lambda: copy.deepcopy(results[-1]))
+    timer.run()
+    first = timer.get_version()
+    assert timer.get_changed_sections() == set(results[0])
+
+    # only current.dt changed, hourly is unchanged
+    results.append(copy.deepcopy(results[-1]))
+    results[-1]["current"]["dt"] += 600
+    timer.run()
+    second = timer.get_version()
+    assert second == first + 1
+    assert timer.get_changed_sections(first) == {"current"}
+
+    # no new version for the same data
+    timer.run()
+    assert timer.get_version() == second
+    assert timer.get_changed_sections(second) == set()
+
+    results.append(copy.deepcopy(results[-1]))
+    del results[-1]["alerts"]
+    results[-1]["hourly"][0]["temp"] += 1
+    timer.run()
+    assert timer.get_changed_sections(second) == {"alerts", "hourly"}
+    assert timer.get_changed_sections(first) == {"alerts", "current", "hourly"}
+
+
+def test_failed_fetch_keeps_last_result():
+    results = [onecall(), None]
+    timer = RepeatedTimer(600, lambda: results.pop(0), keep_last=True)
+    timer.run()
+    version = timer.get_version()
+    assert timer.run() is None
+    assert timer.get_version() == version
+    assert timer.get_result()["current"]["dt"] == onecall()["current"]["dt"]
+
+
+def test_sensor_results():
+    readings = [(21.5, 40), (21.5, 40), (22.0, 40)]
+    timer = RepeatedTimer(60, lambda: readings.pop(0))
+    timer.run()
+    assert timer.get_changed_sections() == {"result"}
+    version = timer.get_version()
+    timer.run()
+    assert timer.get_version() == version
+    timer.run()
+    assert timer.get_changed_sections(version) == {"result"}
@@ -0,0 +1,128 @@
+"""Scheduler tests
+"""
+
+import threading
+import time
+import pytest
+from modules.Scheduler import Scheduler
+
+
+def wait_until(condition, timeout=5):
+    """wait for condition() to become true
+    """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.01)
+
+
+@pytest.fixture(name="scheduler")
+def fixture_scheduler():
+    """scheduler whose jobs are removed after the test
+    """
+    scheduler = Scheduler(max_workers=4)
+    yield scheduler
+    for job in list(scheduler.jobs):
+        scheduler.remove_job(job)
+
+
+def test_fixed_delay_runs_repeatedly(scheduler):
+    finished = []
+    job = scheduler.add_job(0.05, lambda: finished.append(time.monotonic()))
+    wait_until(lambda: len(finished) >= 3)
+    assert job.get_stats()["failures"] == 0
+    # the next run is an interval after the previous one finished
+    assert finished[2] - finished[1] >= 0.05
+
+
+def test_one_run_in_flight(scheduler):
+    lock = threading.Lock()
+    running = []
+    overlaps = []
+
+    def slow():
+        with lock:
+            running.append(1)
+            overlaps.append(len(running))
+        time.sleep(0.12)
+        with lock:
+            running.pop()
+        return True
+
+    job = scheduler.add_job(0.03, slow, mode="fixed_rate")
+    wait_until(lambda: job.runs >= 3)
+    assert max(overlaps) == 1
+    # the slots due while running are skipped
+    assert job.skipped >= 3
+
+
+def test_fixed_rate_keeps_the_slots(scheduler):
+    starts = []
+
+    def run():
+        starts.append(time.monotonic())
+        time.sleep(0.05)
+
+    job = scheduler.add_job(0.1, run, mode="fixed_rate", delay=0.1)
+    first = job.next_run
+    wait_until(lambda: len(starts) >= 3)
+    assert job.skipped == 0
+    # runs start on first + n * interval, not drifting by the run time
+    assert starts[2] - first == pytest.approx(0.2, abs=0.04)
+
+
+def test_failures_back_off_up_to_the_interval(scheduler):
+    results = [None, None, None]
+
+    def fetch():
+        return results.pop(0) if results else True
+
+    job = scheduler.add_job(0.4,
+                            fetch,
+                            backoff=0.02,
+                            none_is_failure=True)
+    wait_until(lambda: job.runs >= 4)
+    stats = job.get_stats()
+    assert (stats["runs"], stats["failures"]) == (4, 3)
+    assert job.consecutive_failures == 0
+
+    # the backoff doubles and is capped at the interval by default
+    job = scheduler.add_job(600, fetch, backoff=5, delay=3600)
+    delays = []
+    for failures in range(1, 10):
+        job.consecutive_failures = failures
+        job.schedule(0, 0)
+        delays.append(job.next_run)
+    assert delays[:4] == [5, 10, 20, 40]
+    assert max(delays) == 600
+
+
+def test_exception_is_a_failure(scheduler):
+
+    def fail():
+        raise RuntimeError("fetch failed")
+
+    job = scheduler.add_job(10, fail, backoff=0.02)
+    wait_until(lambda: job.failures >= 2)
+    assert job.consecutive_failures >= 2
+
+
+def test_remove_job_during_run(scheduler):
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait(5)
+        return True
+
+    job = scheduler.add_job(0.02, blocking)
+    assert started.wait(5)
+    scheduler.remove_job(job)
+    release.set()
+    wait_until(lambda: not job.running)
+    time.sleep(0.1)
+    assert job.runs == 1
+    assert job not in scheduler.jobs
+    assert all(queued is not job for _at, _count, queued in scheduler.queue)
@@ -0,0 +1,115 @@
+# pylint: disable=invalid-name
+"""SessionPool tests
+"""
+
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+import requests
+from modules.SessionPool import SessionPool
+
+
+class Handler(BaseHTTPRequestHandler):
+    """answer every GET with a new connection"""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *_args):  # pylint: disable=arguments-differ
+        pass
+
+
+class KeepAliveHandler(Handler):
+    """answer every GET on the same connection"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+
+def serve(handler):
+    """start a local HTTP server"""
+    server = HTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+@pytest.fixture(name="server")
+def fixture_server():
+    server = serve(Handler)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(name="keep_alive_server")
+def fixture_keep_alive_server():
+    server = serve(KeepAliveHandler)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(name="lookups")
+def fixture_lookups(monkeypatch):
+    """count the socket.getaddrinfo calls per host"""
+    lookups = []
+    getaddrinfo = socket.getaddrinfo
+
+    def counting_getaddrinfo(host, *args, **kwargs):
+        lookups.append(host)
+        return getaddrinfo(host, *args, **kwargs)
+
+    monkeypatch.setattr(socket, "getaddrinfo", counting_getaddrinfo)
+    return lookups
+
+
+def test_dns_cache_is_used_by_the_pool(server, lookups):
+    pool = SessionPool()
+    url = "http://localhost:{}/".format(server.server_port)
+    for _ in range(3):
+        assert pool.get(url).text == "ok"
+    assert lookups.count("localhost") == 1
+
+
+def test_socket_getaddrinfo_is_not_replaced(server, lookups):
+    getaddrinfo = socket.getaddrinfo
+    pool = SessionPool()
+    pool.get("http://localhost:{}/".format(server.server_port))
+    assert socket.getaddrinfo is getaddrinfo
+
+    # lookups outside the pool are not cached
+    socket.getaddrinfo("localhost", server.server_port)
+    socket.getaddrinfo("localhost", server.server_port)
+    assert lookups.count("localhost") == 3
+
+
+def test_failed_lookup_is_not_cached(lookups):
+    pool = SessionPool(timeout=1)
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            pool.get("http://nonexistent.invalid/")
+    assert lookups.count("nonexistent.invalid") == 2
+
+
+def test_keep_alive_connection_is_reused(keep_alive_server, lookups):
+    pool = SessionPool()
+    url = "http://localhost:{}/".format(keep_alive_server.server_port)
+    for _ in range(3):
+        assert pool.get(url).text == "ok"
+    assert pool.get_stats()["localhost"] == {
+        "requests": 3,
+        "connections": 1,
+        "reused": 2
+    }
+    assert lookups.count("localhost") == 1
+
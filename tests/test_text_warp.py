@@ -0,0 +1,69 @@
+# pylint: disable=invalid-name
+"""WeatherModule.text_warp tests
+"""
+
+import pygame
+import pytest
+from modules.WeatherModule import WeatherModule
+
+FONTS = {"name": "Sans", "size": {"large": 30, "medium": 22, "small": 14}}
+
+
+@pytest.fixture(name="module")
+def fixture_module():
+    # fonts are cached by Utils.font, so pygame.font is left initialized
+    pygame.font.init()
+    return WeatherModule(FONTS, {}, "en", "metric", {"rect": [0, 0, 200, 50]})
+
+
+def char_wrap(font, text, line_width, max_lines):
+    """wrapping before word wrap: break at any character"""
+    lines = []
+    line = ""
+    width = 0
+    for char in text:
+        (char_width, _height) = font.size(char)
+        if width + char_width > line_width:
+            lines.append(line)
+            line = ""
+            width = 0
+        line += char
+        width += char_width
+    if line:
+        lines.append(line)
+    if 0 < max_lines < len(lines):
+        lines = lines[:max_lines]
+        lines[max_lines - 1] = lines[max_lines - 1][:-2] + ".."
+    return lines
+
+
+@pytest.mark.parametrize("text", ["20°c Thunderstorm", "12°c Clouds"])
+def test_single_line_headline_keeps_summary(module, text):
+    font = module.font("medium", True)
+    # the summary does not fit by two characters
+    line_width = font.size(text[:-2])[0]
+    lines = module.text_warp(text, line_width, "medium", bold=True,
+                             max_lines=1)
+    assert lines == char_wrap(font, text, line_width, 1)
+    assert lines[0].endswith("..")
+    # the summary is kept, not only the temperature
+    assert lines[0].startswith(text[:text.index(" ") + 2])
+
+
+def test_wrapped_lines_break_at_spaces(module):
+    text = "light rain and moderate wind"
+    font = module.font("small", False)
+    line_width = max(
+        font.size("light rain and")[0],
+        font.size("moderate wind")[0])
+    assert font.size("light rain and m")[0] > line_width
+    lines = module.text_warp(text, line_width, "small")
+    assert lines == ["light rain and", "moderate wind"]
+
+
+def test_last_line_is_filled_before_placeholder(module):
+    text = "light rain and moderate wind"
+    font = module.font("small", False)
+    line_width = font.size("light rain and")[0]
+    lines = module.text_warp(text, line_width, "small", max_lines=1)
+    assert lines == char_wrap(font, text, line_width, 1)
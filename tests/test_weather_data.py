@@ -0,0 +1,105 @@
+"""WeatherData tests
+"""
+
+import copy
+import datetime
+import json
+import os
+import numpy as np
+import pytest
+from modules.WeatherData import WeatherData
+from modules.WeatherModule import Utils
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                       "benchmarks", "fixtures", "onecall.json")
+
+
+def onecall():
+    """recorded One Call response with rain in some hours
+    """
+    with open(FIXTURE, "r") as f:
+        data = json.loads(f.read())
+    for i, record in enumerate(data["hourly"][:6]):
+        if i % 2:
+            record["rain"] = {"1h": 0.25 * i}
+    return data
+
+
+def row_adjust_unit(values, condition, units):
+    """the per-record adjust_unit that the columns replace
+
+    A missing value is None (the original raised TypeError when the parent
+    of a nested field was missing, e.g. rain of rain.1h).
+    """
+    value = values
+    for key in condition.split("."):
+        value = value[key] if value is not None and key in value else None
+    if condition == "dt":
+        return datetime.datetime.fromtimestamp(value)
+    if value is not None:
+        value = float(value)
+    if condition.startswith("temp") or condition == "dew_point":
+        return value if units == "metric" else Utils.fahrenheit(value)
+    if condition in ("wind_speed", "wind_deg"):
+        return round(Utils.kilometer(value) if units == "metric" else value, 1)
+    return value
+
+
+@pytest.mark.parametrize("units", ["metric", "imperial"])
+@pytest.mark.parametrize("block,condition", [
+    ("hourly", "temp"),
+    ("hourly", "humidity"),
+    ("hourly", "wind_speed"),
+    ("hourly", "pop"),
+    ("hourly", "rain.1h"),
+    ("daily", "temp.max"),
+    ("daily", "temp.min"),
+    ("daily", "dew_point"),
+    ("daily", "wind_deg"),
+])
+def test_columns_match_per_record_values(units, block, condition):
+    data = onecall()
+    weather = WeatherData(copy.deepcopy(data), units)
+    expected = [
+        row_adjust_unit(record, condition, units) for record in data[block]
+    ]
+    expected = np.array([np.nan if v is None else v for v in expected])
+    np.testing.assert_allclose(getattr(weather, block).column(condition),
+                               expected)
+
+
+def test_missing_values_are_nan():
+    weather = WeatherData(onecall(), "metric")
+    rain = weather.hourly.column("rain.1h")
+    assert len(rain) == len(weather.hourly)
+    assert np.isnan(rain[0]) and np.isnan(rain[-1])
+    assert rain[1] == 0.25
+    assert np.isnan(weather.hourly["snow.1h"]).all()
+
+
+def test_imperial_conversion():
+    data = onecall()
+    metric = WeatherData(copy.deepcopy(data), "metric")
+    imperial = WeatherData(copy.deepcopy(data), "imperial")
+    np.testing.assert_allclose(imperial.daily.column("temp.max"),
+                               metric.daily["temp.max"] * 1.8 + 32)
+    np.testing.assert_allclose(
+        metric.hourly.column("wind_speed"),
+        np.round(imperial.hourly["wind_speed"] * 1.609344, 1))
+    # the raw columns are in the units of the response
+    np.testing.assert_array_equal(
+        imperial.daily["temp.max"],
+        [day["temp"]["max"] for day in data["daily"]])
+
+
+def test_times_and_records():
+    data = onecall()
+    weather = WeatherData(copy.deepcopy(data), "metric")
+    assert weather.hourly.times() == [
+        row_adjust_unit(record, "dt", "metric") for record in data["hourly"]
+    ]
+    assert weather.current.temp == data["current"]["temp"]
+    assert weather.daily.conditions[0].icon == \
+        data["daily"][0]["weather"][0]["icon"]
+    assert weather.alerts == data["alerts"]
+    assert weather["timezone"] == data["timezone"]